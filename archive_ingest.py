@@ -0,0 +1,294 @@
+import keyword
+import os
+import posixpath
+import re
+import tarfile
+import zipfile
+
+from trace_compaction import estimate_tokens
+
+# Project archive ingestion: stream zip/tar members, build a lightweight import graph,
+# rank files by relevance to the pasted error and pick the top files within a token budget.
+# Pass 1 keeps only per-file features; pass 2 re-reads just the selected members.
+
+SOURCE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".java", ".kt", ".scala", ".cpp", ".cc",
+    ".cxx", ".c", ".h", ".hpp", ".cs", ".go", ".rs", ".php", ".rb", ".dart", ".html", ".css",
+    ".sql", ".json", ".yaml", ".yml", ".toml", ".cfg", ".ini",
+}
+SKIP_DIRECTORIES = {
+    ".git", "node_modules", "__pycache__", ".venv", "venv", "env", "dist", "build", "target",
+    "vendor", "third_party", ".idea", ".vscode", ".mypy_cache", ".pytest_cache", "coverage",
+}
+LANGUAGE_FAMILIES = {
+    ".jsx": ".js", ".ts": ".js", ".tsx": ".js", ".mjs": ".js", ".cjs": ".js",
+    ".kt": ".java", ".scala": ".java",
+    ".cc": ".cpp", ".cxx": ".cpp", ".c": ".cpp", ".h": ".cpp", ".hpp": ".cpp",
+}
+ARCHIVE_TYPES = ["zip", "tar", "gz", "tgz", "bz2", "xz"]
+MAX_FILE_BYTES = 512 * 1024
+MAX_ARCHIVE_MEMBERS = 20000
+DEFAULT_TOKEN_BUDGET = 24000
+CONTEXT_LINES = 60
+
+# Imports live near the top of a file; only that prefix is scanned, in one pass
+IMPORT_SCAN_CHARS = 16 * 1024
+IMPORT_PATTERN = re.compile(
+    r'''^[ \t]*from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+\(?([\w, \t]+)'''
+    r'''|^[ \t]*import[ \t]+([\w.]+)'''
+    r'''|(?:\bfrom[ \t]+|\brequire\([ \t]*|\bimport\([ \t]*|^[ \t]*import[ \t]+)['"]([^'"\n]+)['"]'''
+    r'''|^[ \t]*#include[ \t]+"([^"\n]+)"'''
+    r'''|^[ \t]*require(?:_relative)?[ \t]+['"]([^'"\n]+)['"]'''
+    r'''|^[ \t]*use[ \t]+([\w\\]+)''',
+    re.MULTILINE,
+)
+DEFINITION_PATTERN = re.compile(r'\b(?:def|class|function|func|fn|interface|struct|enum)\s+(\w+)')
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_]\w{2,}')
+# Words that appear in most traces and sources and carry no signal
+COMMON_IDENTIFIERS = frozenset(keyword.kwlist) | frozenset(
+    "none true false self this null undefined return object error exception traceback most recent "
+    "call last line file main module function class type value has attribute not the and for "
+    "with from import new var let const int string str".split()
+)
+MIN_RELEVANCE = 1.0
+# "path/to/file.ext", line 12 | path/to/file.ext:12 | (File.java:12)
+ERROR_LOCATION_PATTERN = re.compile(r'([\w./\\-]+\.[A-Za-z]{1,5})(?:"?,? line |:|\()(\d+)')
+
+
+def is_candidate_path(path):
+    parts = path.replace("\\", "/").split("/")
+    if any(part in SKIP_DIRECTORIES or part.startswith(".") and part not in (".", "..") for part in parts[:-1]):
+        return False
+    return os.path.splitext(parts[-1])[1].lower() in SOURCE_EXTENSIONS
+
+
+# Yields (path, bytes) for every candidate member, one member in memory at a time
+def iter_archive_members(fileobj, wanted=None):
+    fileobj.seek(0)
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for count, info in enumerate(archive.infolist()):
+                if count >= MAX_ARCHIVE_MEMBERS:
+                    break
+                if info.is_dir() or info.file_size > MAX_FILE_BYTES:
+                    continue
+                if wanted is not None and info.filename not in wanted:
+                    continue
+                if wanted is None and not is_candidate_path(info.filename):
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member.read(MAX_FILE_BYTES + 1)
+        return
+
+    fileobj.seek(0)
+    # "r|*" streams members sequentially without building a member index
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for count, info in enumerate(archive):
+            if count >= MAX_ARCHIVE_MEMBERS:
+                break
+            if not info.isfile() or info.size > MAX_FILE_BYTES:
+                continue
+            if wanted is not None and info.name not in wanted:
+                continue
+            if wanted is None and not is_candidate_path(info.name):
+                continue
+            member = archive.extractfile(info)
+            if member is not None:
+                yield info.name, member.read(MAX_FILE_BYTES + 1)
+
+
+def decode_source(data):
+    if b"\0" in data[:1024]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+# Signals extracted from the pasted error: referenced files/lines and identifiers
+def error_signals(error_text):
+    locations = {}
+    for path, line in ERROR_LOCATION_PATTERN.findall(error_text):
+        normalized = path.replace("\\", "/").lstrip("./")
+        locations.setdefault(normalized, set()).add(int(line))
+    identifiers = {token.lower() for token in IDENTIFIER_PATTERN.findall(error_text)} - COMMON_IDENTIFIERS
+    return {"locations": locations, "identifiers": identifiers}
+
+
+# Lines in the error that reference this archive path (matched by suffix)
+def referenced_lines(path, locations):
+    lines = set()
+    for location, line_numbers in locations.items():
+        if path.endswith(location) or location.endswith(path) or \
+                posixpath.basename(location) == posixpath.basename(path) and "/" not in location:
+            lines |= line_numbers
+    return lines
+
+
+def language_family(path):
+    extension = os.path.splitext(path)[1].lower()
+    return LANGUAGE_FAMILIES.get(extension, extension)
+
+
+# Module keys under which other files may import this one
+def module_keys(path):
+    stem = os.path.splitext(path)[0]
+    keys = {stem, posixpath.basename(stem), stem.replace("/", ".")}
+    if posixpath.basename(stem) in ("__init__", "index", "mod"):
+        package = posixpath.dirname(stem)
+        keys |= {package, package.replace("/", "."), posixpath.basename(package)}
+    return {key for key in keys if key}
+
+
+def import_keys(path, source):
+    keys = set()
+    directory = posixpath.dirname(path)
+    # Cheap substring prefilter so the regex only sees candidate lines
+    candidates = "\n".join(
+        line for line in source[:IMPORT_SCAN_CHARS].splitlines()
+        if "import" in line or "require" in line or "include" in line or "use " in line
+    )
+    for groups in IMPORT_PATTERN.findall(candidates):
+        from_module, from_names = groups[0], groups[1]
+        if from_names:
+            # Python "from pkg import mod": the imported names may themselves be modules
+            for name in from_names.replace(" ", "").replace("\t", "").split(","):
+                if name:
+                    keys.add(f"{from_module.lstrip('.')}.{name}".lstrip("."))
+        target = next((group for group in (from_module,) + groups[2:] if group), "").strip()
+        if not target:
+            continue
+        if target.startswith("."):
+            # Relative import (JS "./x" or Python ".x")
+            if "/" in target:
+                keys.add(posixpath.normpath(posixpath.join(directory, target)))
+            else:
+                keys.add(target.lstrip("."))
+        keys.add(target.replace("\\", "."))
+        keys.add(target.split("/")[-1].split(".")[-1])
+        keys.add(os.path.splitext(target)[0])
+    return keys
+
+
+# Pass 1: per-file features only, so memory stays flat regardless of archive size
+def scan_archive(fileobj, error_text):
+    signals = error_signals(error_text)
+    files = {}
+    for path, data in iter_archive_members(fileobj):
+        source = decode_source(data)
+        if source is None:
+            continue
+        lowered = source.lower()
+        definitions = {name.lower() for name in DEFINITION_PATTERN.findall(source)}
+        files[path] = {
+            "path": path,
+            "tokens": estimate_tokens(source),
+            "imports": import_keys(path, source),
+            "lines": referenced_lines(path, signals["locations"]),
+            "definition_hits": len(definitions & signals["identifiers"]),
+            "identifier_hits": sum(1 for token in signals["identifiers"] if token in lowered),
+        }
+    return files
+
+
+# Direct evidence first, then spread relevance along import edges (both directions)
+def rank_files(files, rounds=2, decay=0.5):
+    # Keys claimed by more than one file (e.g. "utils", "index") are ambiguous and ignored
+    key_owner = {}
+    for path in files:
+        for key in module_keys(path):
+            key_owner[key] = path if key_owner.get(key, path) == path else None
+
+    neighbours = {path: set() for path in files}
+    for path, features in files.items():
+        for key in features["imports"]:
+            target = key_owner.get(key)
+            if target and target != path and language_family(target) == language_family(path):
+                neighbours[path].add(target)
+                neighbours[target].add(path)
+
+    direct = {}
+    for path, features in files.items():
+        direct[path] = (
+            10.0 * bool(features["lines"])
+            + 3.0 * min(features["definition_hits"], 5)
+            + 0.2 * min(features["identifier_hits"], 25)
+        )
+
+    scores = dict(direct)
+    for _ in range(rounds):
+        scores = {
+            path: direct[path] + (decay * max(scores[other] for other in linked) if linked else 0.0)
+            for path, linked in neighbours.items()
+        }
+
+    ranked = sorted(files, key=lambda p: (-scores[p], files[p]["tokens"], p))
+    return [(path, scores[path], len(neighbours[path])) for path in ranked]
+
+
+# Greedy selection of top-ranked files within the token budget
+def select_files(files, ranked, token_budget, max_files=25):
+    selected = []
+    remaining = token_budget
+    for path, score, _ in ranked:
+        if score < MIN_RELEVANCE or len(selected) >= max_files or remaining <= 0:
+            break
+        cost = files[path]["tokens"]
+        if cost > remaining and not files[path]["lines"]:
+            continue
+        selected.append(path)
+        remaining -= min(cost, remaining)
+    return selected
+
+
+# Excerpt around referenced lines when the whole file does not fit
+def excerpt(source, lines, token_budget):
+    if estimate_tokens(source) <= token_budget:
+        return source
+    source_lines = source.splitlines()
+    if not lines:
+        return "\n".join(source_lines[:token_budget * 4 // 80]) + "\n# ... truncated ..."
+    keep = set()
+    for line in sorted(lines):
+        keep.update(range(max(0, line - 1 - CONTEXT_LINES), min(len(source_lines), line + CONTEXT_LINES)))
+    chunks, previous = [], None
+    for index in sorted(keep):
+        if previous is not None and index != previous + 1:
+            chunks.append("# ...")
+        chunks.append(source_lines[index])
+        previous = index
+    return "\n".join(chunks)
+
+
+def build_project_context(fileobj, error_text, token_budget=DEFAULT_TOKEN_BUDGET):
+    files = scan_archive(fileobj, error_text)
+    ranked = rank_files(files)
+    selected = select_files(files, ranked, token_budget)
+
+    # Pass 2: read only the selected members
+    sources = {}
+    for path, data in iter_archive_members(fileobj, wanted=set(selected)):
+        sources[path] = decode_source(data) or ""
+
+    sections = []
+    remaining = token_budget
+    for path in selected:
+        body = excerpt(sources.get(path, ""), files[path]["lines"], remaining)
+        remaining -= estimate_tokens(body)
+        sections.append(f"### {path}\n```\n{body}\n```")
+
+    context = (
+        f"**Error / symptom:**\n```\n{error_text}\n```\n\n"
+        f"**Most relevant project files ({len(selected)} of {len(files)}, ranked by relevance):**\n\n"
+        + "\n\n".join(sections)
+    )
+    return {
+        "context": context,
+        "selected": selected,
+        "file_count": len(files),
+        "ranking": [
+            {"path": path, "score": round(score, 2), "links": links,
+             "tokens": files[path]["tokens"], "selected": path in selected}
+            for path, score, links in ranked[:15]
+        ],
+        "tokens": estimate_tokens(context),
+    }
@@ -2,8 +2,6 @@ import streamlit as st
 import base64
 import time
 import json
-from datetime import datetime
-import google.generativeai as genai
 import os
 import io
 from PIL import Image, ImageDraw, ImageFont
@@ -11,8 +9,29 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import re
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from trace_compaction import compact_trace
+from language_detect import AUTO_DETECT, resolve_language, highlight_name
+from history_search import build_index
+from archive_ingest import ARCHIVE_TYPES, DEFAULT_TOKEN_BUDGET, build_project_context
+from log_ingest import scan_log, cluster_prompt
+from prompts import ContextCache
+from followup import FollowUpThread
+from render_cache import RenderCache
+from heavy_hitters import HeavyHitters, error_signatures
+from shared_cache import create_cache
+from incident_store import IncidentStore, read_incidents
+from usage import BudgetGovernor, UsageLedger, add_usage, empty_totals, merge_totals, success_rate, usage_record
+from rate_limit import RateLimiter
+from speculative import SPECULATIVE_WORKERS, SpeculativeAnalyzer, speculative_key
+from image_cache import ImageAnalysisCache, UploadHandleCache, fingerprint_image
+from profiling import profile_call, profile_modes
+from static_check import precheck
+from engine import (
+    FANOUT_MIN_DEPTH, MODEL_NAME, SECTION_WORKERS, analyze_bug, build_report, create_client, extract_code_blocks, make_bug_entry,
+    prepare_text_input, record_entry, report_filename
+)
 
 # Page configuration
 st.set_page_config(
@@ -26,20 +45,72 @@ st.set_page_config(
 @st.cache_resource
 def init_genai_client():
     try:
-        # Get API key from environment variables
-        api_key = os.environ.get('GOOGLE_API_KEY')
-        
-        if not api_key:
-            st.error("Google API key not found. Please set the GOOGLE_API_KEY in your environment variables or Streamlit secrets.")
-            return None
-            
-        # Configure the client
-        genai.configure(api_key=api_key)
-        return genai
+        return create_client()
     except Exception as e:
         st.error(f"Failed to initialize AI client: {str(e)}")
         return None
 
+# Process-wide context caches for the static prompt prefixes
+@st.cache_resource
+def get_context_cache():
+    return ContextCache()
+
+# Process-wide uploaded-file handles by content hash; analyses are reused per session only
+@st.cache_resource
+def get_upload_cache():
+    return UploadHandleCache()
+
+# Shared rate limit for every model call in the process
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter()
+
+# Process-wide per-day and global token/cost totals
+@st.cache_resource
+def get_usage_ledger():
+    return UsageLedger()
+
+@st.cache_resource
+def get_budget_governor():
+    return BudgetGovernor(get_usage_ledger())
+
+# Analysis results shared with other replicas (BUGSQA_SHARED_CACHE), local-only otherwise
+@st.cache_resource
+def get_analysis_cache():
+    return create_cache()
+
+# Incident archive preloaded for every session (BUGSQA_INCIDENT_ARCHIVE), parsed once per process
+@st.cache_resource
+def get_seed_incidents():
+    store = IncidentStore()
+    archive_path = os.environ.get('BUGSQA_INCIDENT_ARCHIVE')
+    if archive_path:
+        try:
+            with open(archive_path, "rb") as archive_file:
+                store.extend(read_incidents(archive_file, archive_path))
+        except (OSError, ValueError) as e:
+            st.warning(f"Could not load incident archive {archive_path}: {str(e)}")
+    return store
+
+# Organization-wide error signature counts, shared by all sessions
+@st.cache_resource
+def get_error_tracker():
+    return HeavyHitters()
+
+# Low-priority workers for speculative analyses, shared by all sessions
+@st.cache_resource
+def get_speculative_executor():
+    return ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculative")
+
+# Concurrent section requests of deep analyses (see engine.analyze_sections), shared by all sessions
+@st.cache_resource
+def get_section_executor():
+    return ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="sections")
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def fingerprint_uploaded_image(image_bytes):
+    return fingerprint_image(image_bytes)
+
 # Enhanced custom CSS with advanced styling
 def load_custom_css():
     st.markdown("""
@@ -507,12 +578,27 @@ def init_session_state():
         st.session_state.bug_history = []
     if 'total_bugs_solved' not in st.session_state:
         st.session_state.total_bugs_solved = 0
-    if 'user_satisfaction' not in st.session_state:
-        st.session_state.user_satisfaction = 95.0
+    if 'usage' not in st.session_state:
+        st.session_state.usage = empty_totals()
     if 'code_snippets' not in st.session_state:
         st.session_state.code_snippets = []
+    if 'history_index' not in st.session_state:
+        st.session_state.history_index = build_index(st.session_state.bug_history)
+    if 'followups' not in st.session_state:
+        st.session_state.followups = {}
+    if 'result_html' not in st.session_state:
+        st.session_state.result_html = RenderCache()
+    if 'speculator' not in st.session_state:
+        st.session_state.speculator = SpeculativeAnalyzer(get_speculative_executor(), get_rate_limiter())
     if 'error_patterns' not in st.session_state:
         st.session_state.error_patterns = {}
+    if 'incident_store' not in st.session_state:
+        st.session_state.incident_store = get_seed_incidents().copy()
+        st.session_state.imported_archives = set()
+    if 'profiles' not in st.session_state:
+        st.session_state.profiles = []
+    if 'image_analyses' not in st.session_state:
+        st.session_state.image_analyses = ImageAnalysisCache()
     if 'user_preferences' not in st.session_state:
         st.session_state.user_preferences = {
             'theme': 'light',
@@ -545,10 +631,10 @@ def render_sidebar():
             """, unsafe_allow_html=True)
         
         with col2:
-            satisfaction_rate = st.session_state.user_satisfaction
+            satisfaction_rate = success_rate(st.session_state.usage)
             st.markdown(f"""
             <div class="stat-card slide-in-right">
-                <p class="stat-number">{satisfaction_rate:.0f}%</p>
+                <p class="stat-number">{"—" if satisfaction_rate is None else f"{satisfaction_rate:.0f}%"}</p>
                 <p class="stat-label">Success Rate</p>
             </div>
             """, unsafe_allow_html=True)
@@ -556,10 +642,12 @@ def render_sidebar():
         # Success rate progress bar
         st.markdown(f"""
         <div class="progress-bar">
-            <div class="progress-fill" style="width: {satisfaction_rate}%"></div>
+            <div class="progress-fill" style="width: {satisfaction_rate or 0}%"></div>
         </div>
         """, unsafe_allow_html=True)
         
+        render_usage_panel()
+        
         st.markdown("---")
         
         # Enhanced feature list
@@ -612,12 +700,32 @@ def render_sidebar():
             help="1=Quick Fix, 5=Deep Analysis"
         )
         
+        st.checkbox(
+            "⚡ Parallel sections",
+            value=True,
+            key="parallel_sections",
+            help=f"At depth {FANOUT_MIN_DEPTH}+, generate the independent sections as concurrent requests and show them as they complete"
+        )
+        
+        st.radio(
+            "🧪 Local pre-check:",
+            list(PRECHECK_MODES),
+            key="precheck_mode",
+            help="Check code locally (Python parser and symbol table, bracket and JSON checks) before the model call"
+        )
+        
         st.markdown("---")
         
         # Quick actions
         st.markdown("### ⚡ Quick Actions")
         if st.button("🔄 Clear History", help="Clear all bug history"):
             st.session_state.bug_history = []
+            st.session_state.history_index = build_index([])
+            st.session_state.followups = {}
+            st.session_state.result_html.clear()
+            st.session_state.error_patterns = {}
+            st.session_state.incident_store = get_seed_incidents().copy()
+            st.session_state.imported_archives = set()
             st.session_state.total_bugs_solved = 0
             st.success("History cleared!")
         
@@ -626,126 +734,108 @@ def render_sidebar():
         
         return severity.split(' ')[1], language.split(' ')[1], complexity, analysis_depth
 
-# Enhanced bug analysis with visualization
-def analyze_bug_advanced(client, bug_input, input_type, severity, language, complexity, analysis_depth):
-    try:
-        base_prompt = f"""
-        You are an advanced software debugging AI assistant with expertise in multiple programming languages and frameworks.
-        
-        **Context:**
-        - Bug Severity: {severity}
-        - Programming Language/Framework: {language}
-        - Code Complexity Level: {complexity}
-        - Analysis Depth: {analysis_depth}/5
-        
-        **Bug Input Type:** {input_type}
-        """
-        
-        if input_type == "text":
-            detailed_prompt = base_prompt + f"""
-            
-            **Bug Description/Error:**
-            ```
-            {bug_input}
-            ```
-            
-            **Required Analysis (Depth Level {analysis_depth}):**
-            
-            ## 🔍 **IMMEDIATE DIAGNOSIS**
-            Provide a quick summary of what's wrong.
-            
-            ## 🎯 **ROOT CAUSE ANALYSIS**
-            Identify the exact cause with detailed explanation.
-            
-            ## 💡 **STEP-BY-STEP SOLUTION**
-            1. Immediate fix steps
-            2. Implementation details
-            3. Testing approach
-            
-            ## 👨‍💻 **CORRECTED CODE**
-            Provide the complete, error-free code with explanations:
-            ```{language.lower()}
-            // Your fixed code here
-            ```
-            
-            ## 🔧 **CODE IMPROVEMENTS**
-            Suggest optimizations and best practices.
-            
-            ## 🛡️ **PREVENTION STRATEGIES**
-            How to avoid this issue in the future.
-            
-            ## ⚡ **ALTERNATIVE SOLUTIONS**
-            Provide 2-3 different approaches to solve this.
-            
-            ## 🧪 **TESTING RECOMMENDATIONS**
-            - Unit tests to write
-            - Edge cases to consider
-            - Validation steps
-            
-            ## 📊 **PERFORMANCE IMPACT**
-            Analyze if the fix affects performance.
-            
-            ## 🔗 **RELATED ISSUES**
-            Common related problems to watch for.
-            
-            Please format your response with clear headers and provide practical, actionable solutions.
-            """
-            
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=detailed_prompt
-            )
-            
-        else:  # image input
-            image_prompt = base_prompt + f"""
-            
-            **Instructions for Image Analysis:**
-            Please analyze this screenshot/image of a bug/error and provide comprehensive debugging assistance.
-            
-            **Required Analysis:**
-            
-            ## 👁️ **VISUAL ANALYSIS**
-            Describe exactly what you see in the image.
-            
-            ## 🔍 **ERROR IDENTIFICATION**
-            Identify the specific error or issue shown.
-            
-            ## 🎯 **ROOT CAUSE ANALYSIS**
-            Explain why this error is occurring.
-            
-            ## 💡 **COMPLETE SOLUTION**
-            Provide step-by-step fix instructions.
-            
-            ## 👨‍💻 **CORRECTED CODE**
-            Write the complete, error-free code:
-            ```{language.lower()}
-            // Your fixed code here
-            ```
-            
-            ## 🔧 **IMPROVEMENTS & OPTIMIZATIONS**
-            Suggest enhancements to the code.
-            
-            ## 🛡️ **PREVENTION TIPS**
-            How to avoid this issue going forward.
-            
-            ## 🧪 **TESTING STRATEGY**
-            Recommend testing approaches.
-            
-            Be specific and provide complete, working solutions.
-            """
-            
-            # Upload image to Gemini
-            uploaded_file = client.files.upload(file=bug_input)
-            
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[uploaded_file, image_prompt]
-            )
-        
-        return response.text
+# Token usage and estimated cost for this session, today and overall
+def render_usage_panel():
+    session = st.session_state.usage
+    ledger = get_usage_ledger()
+    today = ledger.day()
+    overall = ledger.totals()
+    
+    st.markdown("### 💰 Usage & Cost")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "scope": scope,
+                "calls": totals["calls"],
+                "errors": totals["errors"],
+                "tokens in": totals["input_tokens"],
+                "tokens out": totals["output_tokens"],
+                "cost $": round(totals["cost"], 4),
+            }
+            for scope, totals in (("Session", session), ("Today", today), ("All time", overall))
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
     
-    except Exception as e:
-        return f"❌ **Analysis Error:** {str(e)}\n\nPlease check your input and try again."
+    governor = get_budget_governor()
+    if governor.enabled:
+        remaining = governor.remaining_fraction()
+        st.progress(remaining, text=f"Monthly budget: {remaining:.0%} of ${governor.monthly_budget:,.2f} left")
+        model, depth = governor.plan(MODEL_NAME, 5)
+        if model != MODEL_NAME or depth < 5:
+            st.caption(f"⚖️ Budget saver active: analysis depth capped at {depth}, model {model}")
+
+# Merge the usage of finished speculative jobs into the session totals (script thread only)
+def collect_background_usage():
+    for job_usage in st.session_state.speculator.finished_usage():
+        merge_totals(st.session_state.usage, job_usage)
+
+# Store usage of one model call in the session and process-wide totals
+def usage_recorder(session_usage):
+    ledger = get_usage_ledger()
+    
+    def record(usage):
+        ledger.record(usage)
+        add_usage(session_usage, usage)
+    return record
+
+# Enhanced bug analysis with visualization
+def analyze_bug_advanced(client, bug_input, input_type, severity, language, complexity, analysis_depth, rate_limited=True, usage=None, local_findings=""):
+    upload_cache = get_upload_cache()
+    # The budget governor may lower the depth or pick a cheaper model as the budget runs down
+    model, analysis_depth = get_budget_governor().plan(MODEL_NAME, analysis_depth)
+    # Background jobs hold a single low-priority rate limit slot, so they never fan out
+    parallel_sections = usage is None and st.session_state.get("parallel_sections", True)
+    
+    # Sections are shown as they complete, except in background jobs which cannot draw
+    progress = st.empty() if usage is None else None
+    run_analysis = partial(
+        analyze_bug,
+        client, bug_input, input_type, severity, language, complexity, analysis_depth,
+        model=model,
+        cache=get_analysis_cache(),
+        # Background jobs pass their own totals since they cannot reach st.session_state
+        on_usage=usage_recorder(st.session_state.usage if usage is None else usage),
+        context_cache=get_context_cache(),
+        upload_cache=upload_cache,
+        # Speculative jobs take their own low-priority slot before calling in
+        rate_limiter=get_rate_limiter() if rate_limited else None,
+        fingerprint=fingerprint_uploaded_image(bug_input) if input_type == "image" else None,
+        executor=get_section_executor() if parallel_sections else None,
+        on_progress=progress.markdown if progress is not None else None,
+        local_findings=local_findings
+    )
+    if usage is None and "analysis" in st.session_state.profile_modes:
+        result, report = profile_call(f"analysis-{input_type}-depth{analysis_depth}", run_analysis)
+        keep_profile(report)
+    else:
+        result = run_analysis()
+    if progress is not None:
+        progress.empty()
+    return result
+
+# Most recent profile reports of this session, newest first
+MAX_PROFILES = 5
+
+def keep_profile(report):
+    if report is not None:
+        st.session_state.profiles = [report] + st.session_state.profiles[:MAX_PROFILES - 1]
+
+# Operator-only: summaries of profiled reruns and analyses (see profiling.py)
+def render_profiles():
+    if not st.session_state.profiles:
+        return
+    with st.expander("🩺 Profiles", expanded=False):
+        for report in st.session_state.profiles:
+            st.markdown(f"**{report.label}** at {report.started:%H:%M:%S}: {report.wall_ms:,.1f} ms, peak traced memory {report.peak_kb:,.1f} KB")
+            if report.paths:
+                st.caption("Saved to " + ", ".join(report.paths))
+            col_cpu, col_memory = st.columns(2)
+            with col_cpu:
+                st.dataframe(pd.DataFrame(report.functions), use_container_width=True, hide_index=True)
+            with col_memory:
+                st.dataframe(pd.DataFrame(report.allocations), use_container_width=True, hide_index=True)
 
 # Code diff viewer
 def display_code_diff(original_code, fixed_code, language="python"):
@@ -763,21 +853,41 @@ def display_code_diff(original_code, fixed_code, language="python"):
 
 # Error visualization function
 def create_error_visualizations():
-    if not st.session_state.bug_history:
+    store = st.session_state.incident_store
+    if not len(store):
         st.info("📊 No data available yet. Analyze some bugs to see visualizations!")
         return
     
     st.markdown("### 📊 Bug Analytics Dashboard")
     
-    # Prepare data
-    df = pd.DataFrame(st.session_state.bug_history)
+    # Time-range drill-down over the pre-aggregated daily/weekly rollups
+    first_day, last_day = store.date_bounds()
+    col_range, col_granularity = st.columns([3, 1])
+    with col_range:
+        date_range = st.date_input(
+            "📅 Time range:",
+            value=(first_day, last_day),
+            min_value=first_day,
+            max_value=last_day,
+            key="dashboard_range"
+        )
+    with col_granularity:
+        granularity = st.radio("Granularity:", ["Daily", "Weekly"], horizontal=True, key="dashboard_granularity")
+    start = date_range[0] if len(date_range) >= 1 else first_day
+    end = date_range[1] if len(date_range) == 2 else last_day
+    
+    query_start = time.perf_counter()
+    severity_counts = store.counts('severity', start, end)
+    language_counts = store.counts('language', start, end)
+    timeline = store.timeline(start, end, "W" if granularity == "Weekly" else "D")
+    query_ms = (time.perf_counter() - query_start) * 1000
+    st.caption(f"{int(timeline.sum()):,} incidents between {start} and {end} (queried in {query_ms:.0f} ms)")
     
     # Create multiple visualizations
     col1, col2 = st.columns(2)
     
     with col1:
         # Bug severity distribution
-        severity_counts = df['severity'].value_counts()
         fig_severity = px.pie(
             values=severity_counts.values,
             names=severity_counts.index,
@@ -793,7 +903,7 @@ def create_error_visualizations():
     
     with col2:
         # Language distribution
-        language_counts = df['language'].value_counts()
+        language_counts = language_counts[language_counts > 0].head(15)
         fig_lang = px.bar(
             x=language_counts.index,
             y=language_counts.values,
@@ -809,35 +919,28 @@ def create_error_visualizations():
         st.plotly_chart(fig_lang, use_container_width=True)
     
     # Timeline analysis
-    if len(df) > 1:
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
-        daily_bugs = df.groupby('date').size().reset_index(name='count')
-        
+    if len(timeline) > 1:
         fig_timeline = px.line(
-            daily_bugs,
-            x='date',
-            y='count',
+            x=timeline.index,
+            y=timeline.values,
             title="📈 Bug Reporting Timeline",
-            markers=True
+            markers=len(timeline) <= 120
         )
         fig_timeline.update_layout(
-            xaxis_title="Date",
+            xaxis_title="Week" if granularity == "Weekly" else "Date",
             yaxis_title="Number of Bugs",
             height=300
         )
         st.plotly_chart(fig_timeline, use_container_width=True)
     
+    with st.expander("🔎 Incidents in range (newest 100)"):
+        st.dataframe(store.incidents(start, end, limit=100), use_container_width=True, hide_index=True)
+    
     # Bug pattern analysis
     st.markdown("### 🔍 Error Pattern Analysis")
     
-    # Extract common error patterns
-    error_patterns = {}
-    for bug in st.session_state.bug_history:
-        # Simple pattern extraction (can be enhanced)
-        words = bug['input'].lower().split()
-        for word in words:
-            if any(keyword in word for keyword in ['error', 'exception', 'failed', 'undefined', 'null']):
-                error_patterns[word] = error_patterns.get(word, 0) + 1
+    # Counted incrementally as analyses are recorded
+    error_patterns = st.session_state.error_patterns
     
     if error_patterns:
         # Top error patterns
@@ -858,6 +961,182 @@ def create_error_visualizations():
         )
         st.plotly_chart(fig_patterns, use_container_width=True)
 
+# Seed the dashboard with a historical incident export (JSONL or Parquet)
+def render_incident_import():
+    with st.expander("📥 Import Incident Archive", expanded=False):
+        archive = st.file_uploader(
+            "Incident export (JSONL, JSON or Parquet) with timestamp, language, severity and type fields:",
+            type=["jsonl", "json", "ndjson", "parquet"],
+            key="incident_archive"
+        )
+        if archive is None or not st.button("📥 Import Incidents", key="import_incidents"):
+            return
+        
+        archive_key = (archive.name, archive.size)
+        if archive_key in st.session_state.imported_archives:
+            st.info("This archive has already been imported")
+            return
+        
+        with st.spinner("📥 Importing incidents..."):
+            try:
+                frame = read_incidents(archive, archive.name)
+            except ValueError as e:
+                st.error(f"❌ Import failed: {str(e)}")
+                return
+            st.session_state.incident_store.extend(frame)
+            st.session_state.imported_archives.add(archive_key)
+        st.success(f"Imported {len(frame):,} incidents")
+
+# Top error signatures across all sessions in sliding windows
+def render_trending_errors():
+    st.markdown("### 🔥 Trending Across All Users")
+    tracker = get_error_tracker()
+    window = st.radio("Window:", ["Trending", "Last hour", "Last day", "Last week"], horizontal=True, key="trending_window")
+    
+    if window == "Trending":
+        rows = tracker.trending(k=10)
+    else:
+        rows = [
+            {"signature": signature, "count": count, "± bound": error}
+            for signature, count, error in tracker.top(window.split()[-1], k=10)
+        ]
+    
+    if not rows:
+        st.info("No error signatures recorded in this window yet")
+        return
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    if window == "Trending":
+        st.caption("Trend = last-hour count relative to the hourly average over the last day")
+
+# Store an analysis in history and keep the search index in sync
+def record_bug_entry(bug_entry):
+    st.session_state.total_bugs_solved += 1
+    entry_id = record_entry(st.session_state.bug_history, st.session_state.history_index, bug_entry)
+    st.session_state.result_html.put(entry_id, bug_entry['result'])
+    st.session_state.incident_store.append(bug_entry)
+    
+    # Error signatures feed this session's patterns and the process-wide top-k
+    tracker = get_error_tracker()
+    patterns = st.session_state.error_patterns
+    for signature in error_signatures(bug_entry['input']):
+        patterns[signature] = patterns.get(signature, 0) + 1
+        tracker.add(signature)
+    return entry_id
+
+# Sanitized HTML of an entry's result, rendered once at insert time
+def result_html(entry_id):
+    return st.session_state.result_html.get(entry_id, st.session_state.bug_history[entry_id]['result'])
+
+def render_result(entry_id):
+    st.markdown(f"<div class='solution-box'>\n{result_html(entry_id)}</div>", unsafe_allow_html=True)
+
+HISTORY_PAGE_SIZE = 10
+
+# One page of history per rerun, newest first; only that page's HTML is sent
+def render_history_page():
+    history = st.session_state.bug_history
+    page_count = max(1, -(-len(history) // HISTORY_PAGE_SIZE))
+    
+    with st.expander(f"View Bug Analyses ({len(history):,})", expanded=False):
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="history_page")
+        with col2:
+            st.caption(f"Page {page} of {page_count}, newest first")
+        
+        newest = len(history) - (page - 1) * HISTORY_PAGE_SIZE
+        for entry_id in range(newest - 1, max(newest - HISTORY_PAGE_SIZE, 0) - 1, -1):
+            bug = history[entry_id]
+            st.markdown(
+                f"<div class=\"feature-card\">\n"
+                f"<h4>🐛 Bug #{entry_id + 1} - {bug['severity']} severity in {bug['language']}</h4>\n"
+                f"<p><small>{bug['timestamp']}</small></p>\n"
+                f"<details>\n<summary>View Details</summary>\n"
+                f"<div class=\"solution-box\">\n{result_html(entry_id)}</div>\n"
+                f"</details>\n</div>",
+                unsafe_allow_html=True
+            )
+
+# Compact one-line summary of a history entry for search results
+def history_hit_title(entry_id, score):
+    bug = st.session_state.bug_history[entry_id]
+    return f"Bug #{entry_id + 1} · {bug['severity']} · {bug['language']} · {bug['timestamp'][:16]} · score {score:.2f}"
+
+# "Similar past bugs" panel shown next to a fresh analysis
+def render_similar_bugs(query, exclude_id):
+    matches = st.session_state.history_index.search(query, k=3, exclude=[exclude_id])
+    if not matches:
+        return
+    st.markdown("#### 🧩 Similar Past Bugs")
+    for entry_id, score in matches:
+        with st.expander(history_hit_title(entry_id, score)):
+            st.markdown(st.session_state.bug_history[entry_id]['result'])
+
+# Full-text search with language, severity and date filters
+def render_history_search():
+    index = st.session_state.history_index
+    query = st.text_input("🔎 Search past analyses:", placeholder="e.g. KeyError pandas merge", key="history_query")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        languages = sorted(lang for lang in index.by_language if lang)
+        language_filter = st.selectbox("Language", ["All"] + languages, key="history_language")
+    with col2:
+        severities = [sev for sev in ["Low", "Medium", "High", "Critical"] if sev in index.by_severity]
+        severity_filter = st.selectbox("Severity", ["All"] + severities, key="history_severity")
+    with col3:
+        date_range = st.date_input("Date range", value=(), key="history_dates")
+    
+    if not query.strip():
+        return
+    
+    start = end = None
+    if len(date_range) >= 1:
+        start = f"{date_range[0].isoformat()}T00:00:00"
+    if len(date_range) == 2:
+        end = f"{date_range[1].isoformat()}T23:59:59.999999"
+    
+    search_start = time.perf_counter()
+    matches = index.search(
+        query,
+        k=10,
+        language=None if language_filter == "All" else language_filter,
+        severity=None if severity_filter == "All" else severity_filter,
+        start=start,
+        end=end
+    )
+    elapsed_ms = (time.perf_counter() - search_start) * 1000
+    st.caption(f"{len(matches)} matches from {len(index):,} analyses in {elapsed_ms:.1f} ms")
+    for entry_id, score in matches:
+        bug = st.session_state.bug_history[entry_id]
+        preview = bug['input'].strip().splitlines()[0][:120] if bug['input'].strip() else bug['type']
+        st.markdown(f"**{history_hit_title(entry_id, score)}**  \n`{preview}`")
+
+PRECHECK_MODES = {
+    "Attach findings to prompt": "attach",
+    "Skip the model on definite errors": "skip",
+    "Off": "off",
+}
+
+# Instant local diagnosis (see static_check.py); returns the findings block for the prompt
+# and, in skip mode with definite errors, the local result that replaces the model call
+def run_precheck(text, language):
+    findings, local_findings, local_result = precheck(text, language, PRECHECK_MODES[st.session_state.precheck_mode])
+    if local_result is not None:
+        st.caption("🧪 Diagnosed locally, without a model call")
+    elif findings:
+        st.warning("🧪 Local pre-check found:\n" + "\n".join(
+            f"- Line {item['line']}, column {item['column']}: {item['message']}" for item in findings
+        ))
+    return local_findings, local_result
+
+SPECULATIVE_STATUS = {
+    "debouncing": "⚡ Speculative analysis starts once the input settles",
+    "waiting": "⚡ Speculative analysis queued behind other requests",
+    "running": "⚡ Speculative analysis running in the background",
+    "done": "⚡ Speculative analysis ready",
+}
+
 # Enhanced bug input section
 def render_enhanced_bug_input(client, severity, language, complexity, analysis_depth):
     st.markdown("""
@@ -868,7 +1147,7 @@ def render_enhanced_bug_input(client, severity, language, complexity, analysis_d
     """, unsafe_allow_html=True)
     
     # Enhanced input tabs
-    tab1, tab2, tab3 = st.tabs(["📝 Text/Code Input", "🖼️ Image Upload", "📂 File Upload"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 Text/Code Input", "🖼️ Image Upload", "📂 File Upload", "📜 Log File"])
     
     with tab1:
         st.markdown("""
@@ -889,40 +1168,93 @@ Stack trace:
             help="Paste your error message, stack trace, or problematic code"
         )
         
+        compact_input = st.checkbox(
+            "🗜️ Compact stack traces before analysis",
+            value=True,
+            help="Collapse repeated frames, fold framework frames, strip ANSI codes and timestamps"
+        )
+        
+        speculative_mode = st.checkbox(
+            "⚡ Speculative analysis",
+            value=False,
+            key="speculative_mode",
+            help="Start analyzing in the background once the input and settings stop changing, so the result is ready when you click Analyze"
+        )
+        
+        speculator = st.session_state.speculator
+        precheck_mode = PRECHECK_MODES[st.session_state.precheck_mode]
+        if speculative_mode and bug_text.strip():
+            analysis_language, prompt_input, _ = prepare_text_input(bug_text, language, compact_input)
+            _, local_findings, local_result = precheck(bug_text, analysis_language, precheck_mode)
+            if local_result is None:
+                # The job fills its own totals; they are merged into the session on this thread
+                job_usage = empty_totals()
+                speculator.schedule(
+                    speculative_key(prompt_input, severity, analysis_language, complexity, analysis_depth, local_findings),
+                    partial(analyze_bug_advanced, client, prompt_input, "text", severity, analysis_language,
+                            complexity, analysis_depth, rate_limited=False, usage=job_usage,
+                            local_findings=local_findings),
+                    usage=job_usage
+                )
+                st.caption(SPECULATIVE_STATUS.get(speculator.status(), ""))
+            else:
+                speculator.cancel()
+        else:
+            speculator.cancel()
+        
         if st.button("🔍 Analyze Text Bug", key="analyze_text"):
             if bug_text.strip():
                 with st.spinner("🧠 Analyzing bug with AI..."):
-                    analysis_result = analyze_bug_advanced(
-                        client, 
-                        bug_text, 
-                        "text", 
-                        severity, 
-                        language, 
-                        complexity, 
-                        analysis_depth
-                    )
+                    analysis_language, prompt_input, compaction = prepare_text_input(bug_text, language, compact_input)
+                    if language == AUTO_DETECT:
+                        st.caption(f"🤖 Detected language: {analysis_language}")
+                    if compaction and compaction["changed"]:
+                        st.caption(
+                            f"🗜️ Input compacted: ~{compaction['original_tokens']:,} → "
+                            f"~{compaction['compacted_tokens']:,} tokens"
+                        )
+                    
+                    local_findings, analysis_result = run_precheck(bug_text, analysis_language)
+                    if speculative_mode and analysis_result is None:
+                        analysis_result = speculator.take(
+                            speculative_key(prompt_input, severity, analysis_language, complexity, analysis_depth, local_findings)
+                        )
+                        collect_background_usage()
+                        if analysis_result is not None:
+                            st.caption("⚡ Served from the speculative background analysis")
+                    if analysis_result is None:
+                        analysis_result = analyze_bug_advanced(
+                            client, 
+                            prompt_input, 
+                            "text", 
+                            severity, 
+                            analysis_language, 
+                            complexity, 
+                            analysis_depth,
+                            local_findings=local_findings
+                        )
                     
                     # Store in history
-                    bug_entry = {
-                        "input": bug_text,
-                        "result": analysis_result,
-                        "severity": severity,
-                        "language": language,
-                        "complexity": complexity,
-                        "timestamp": datetime.now().isoformat(),
-                        "type": "text"
-                    }
-                    st.session_state.bug_history.append(bug_entry)
-                    st.session_state.total_bugs_solved += 1
+                    bug_entry = make_bug_entry(
+                        bug_text,
+                        analysis_result,
+                        severity,
+                        analysis_language,
+                        complexity,
+                        "text"
+                    )
+                    entry_id = record_bug_entry(bug_entry)
                     
                     # Display results
                     st.markdown("## 🎯 Analysis Results")
-                    st.markdown(f"<div class='solution-box'>{analysis_result}</div>", unsafe_allow_html=True)
+                    render_result(entry_id)
                     
                     # Try to extract code blocks for diff view
-                    code_blocks = re.findall(r'```.*?\n(.*?)\n```', analysis_result, re.DOTALL)
+                    code_blocks = extract_code_blocks(analysis_result)
                     if len(code_blocks) >= 2:
-                        display_code_diff(code_blocks[0], code_blocks[1], language.lower())
+                        display_code_diff(code_blocks[0], code_blocks[1], highlight_name(analysis_language))
+                    
+                    render_similar_bugs(bug_text, entry_id)
             else:
                 st.warning("Please enter some bug details to analyze")
 
@@ -948,33 +1280,45 @@ Stack trace:
                     try:
                         # Convert to bytes for Gemini
                         image_bytes = uploaded_image.getvalue()
+                        analysis_language = resolve_language(language)
                         
-                        analysis_result = analyze_bug_advanced(
-                            client, 
-                            image_bytes, 
-                            "image", 
-                            severity, 
-                            language, 
-                            complexity, 
-                            analysis_depth
-                        )
+                        # Reuse this session's analysis of the same screenshot with the same settings
+                        analysis_cache = st.session_state.image_analyses
+                        fingerprint = fingerprint_uploaded_image(image_bytes)
+                        params = (severity, analysis_language, complexity, analysis_depth)
+                        cached = analysis_cache.lookup(fingerprint, params)
+                        
+                        if cached:
+                            analysis_result = cached
+                            st.info("♻️ Reused the analysis of an identical screenshot")
+                        else:
+                            analysis_result = analyze_bug_advanced(
+                                client, 
+                                image_bytes, 
+                                "image", 
+                                severity, 
+                                analysis_language, 
+                                complexity, 
+                                analysis_depth
+                            )
+                            if not analysis_result.startswith("❌"):
+                                analysis_cache.store(fingerprint, params, analysis_result)
                         
                         # Store in history
-                        bug_entry = {
-                            "input": "Image upload",
-                            "result": analysis_result,
-                            "severity": severity,
-                            "language": language,
-                            "complexity": complexity,
-                            "timestamp": datetime.now().isoformat(),
-                            "type": "image"
-                        }
-                        st.session_state.bug_history.append(bug_entry)
-                        st.session_state.total_bugs_solved += 1
+                        bug_entry = make_bug_entry(
+                            "Image upload",
+                            analysis_result,
+                            severity,
+                            analysis_language,
+                            complexity,
+                            "image"
+                        )
+                        entry_id = record_bug_entry(bug_entry)
                         
                         # Display results
                         st.markdown("## 🎯 Analysis Results")
-                        st.markdown(f"<div class='solution-box'>{analysis_result}</div>", unsafe_allow_html=True)
+                        render_result(entry_id)
+                        render_similar_bugs(analysis_result, entry_id)
                         
                     except Exception as e:
                         st.error(f"Image analysis failed: {str(e)}")
@@ -983,50 +1327,283 @@ Stack trace:
         st.markdown("""
         <div class="feature-card">
             <h4>📂 Upload Code File</h4>
-            <p>Upload your source code file for comprehensive analysis.</p>
+            <p>Upload a single source file, or a zip/tar archive of your project together with the error.</p>
         </div>
         """, unsafe_allow_html=True)
         
-        uploaded_file = st.file_uploader(
-            "Choose a code file:",
-            type=["py", "js", "java", "cpp", "c", "cs", "go", "rs", "php", "rb", "html", "css"],
-            key="file_uploader"
+        upload_mode = st.radio(
+            "Upload mode:",
+            ["📄 Single file", "🗜️ Project archive"],
+            horizontal=True,
+            key="file_upload_mode"
         )
         
-        if uploaded_file is not None:
-            file_contents = uploaded_file.getvalue().decode("utf-8")
+        if upload_mode == "🗜️ Project archive":
+            render_archive_upload(client, severity, language, complexity, analysis_depth)
+        else:
+            uploaded_file = st.file_uploader(
+                "Choose a code file:",
+                type=["py", "js", "java", "cpp", "c", "cs", "go", "rs", "php", "rb", "html", "css"],
+                key="file_uploader"
+            )
+        
+            if uploaded_file is not None:
+                file_contents = uploaded_file.getvalue().decode("utf-8")
+                file_language = resolve_language(language, file_contents, uploaded_file.name)
             
-            st.markdown("#### 📄 File Contents Preview")
-            st.code(file_contents, language=language.lower())
+                st.markdown("#### 📄 File Contents Preview")
+                if language == AUTO_DETECT:
+                    st.caption(f"🤖 Detected language: {file_language}")
+                st.code(file_contents, language=highlight_name(file_language))
             
-            if st.button("🔍 Analyze Code File", key="analyze_file"):
-                with st.spinner("🔎 Analyzing code file..."):
-                    analysis_result = analyze_bug_advanced(
-                        client, 
-                        file_contents, 
-                        "text", 
-                        severity, 
-                        language, 
-                        complexity, 
-                        analysis_depth
-                    )
+                if st.button("🔍 Analyze Code File", key="analyze_file"):
+                    with st.spinner("🔎 Analyzing code file..."):
+                        local_findings, analysis_result = run_precheck(file_contents, file_language)
+                        if analysis_result is None:
+                            analysis_result = analyze_bug_advanced(
+                                client, 
+                                file_contents, 
+                                "text", 
+                                severity, 
+                                file_language, 
+                                complexity, 
+                                analysis_depth,
+                                local_findings=local_findings
+                            )
                     
-                    # Store in history
-                    bug_entry = {
-                        "input": f"File: {uploaded_file.name}",
-                        "result": analysis_result,
-                        "severity": severity,
-                        "language": language,
-                        "complexity": complexity,
-                        "timestamp": datetime.now().isoformat(),
-                        "type": "file"
-                    }
-                    st.session_state.bug_history.append(bug_entry)
-                    st.session_state.total_bugs_solved += 1
+                        # Store in history
+                        bug_entry = make_bug_entry(
+                            f"File: {uploaded_file.name}",
+                            analysis_result,
+                            severity,
+                            file_language,
+                            complexity,
+                            "file"
+                        )
+                        entry_id = record_bug_entry(bug_entry)
                     
-                    # Display results
-                    st.markdown("## 🎯 Analysis Results")
-                    st.markdown(f"<div class='solution-box'>{analysis_result}</div>", unsafe_allow_html=True)
+                        # Display results
+                        st.markdown("## 🎯 Analysis Results")
+                        render_result(entry_id)
+                        render_similar_bugs(file_contents, entry_id)
+
+    with tab4:
+        render_log_upload(client, severity, language, complexity, analysis_depth)
+
+# Project archive mode: rank files by relevance to the error, send only the top ones
+def render_archive_upload(client, severity, language, complexity, analysis_depth):
+    uploaded_archive = st.file_uploader(
+        "Choose a project archive (zip or tar):",
+        type=ARCHIVE_TYPES,
+        key="archive_uploader"
+    )
+    error_text = st.text_area(
+        "Paste the error or stack trace:",
+        height=150,
+        key="archive_error",
+        help="Used to rank which files in the archive are relevant"
+    )
+    token_budget = st.number_input(
+        "Token budget for source files:",
+        min_value=2000,
+        max_value=200000,
+        value=DEFAULT_TOKEN_BUDGET,
+        step=2000
+    )
+    
+    if uploaded_archive is None:
+        return
+    
+    if st.button("🔍 Analyze Project", key="analyze_archive"):
+        if not error_text.strip():
+            st.warning("Please paste the error so relevant files can be found")
+            return
+        
+        with st.spinner("🗜️ Scanning archive and ranking files..."):
+            try:
+                error_input = compact_trace(error_text)["text"]
+                project = build_project_context(uploaded_archive, error_input, token_budget)
+            except Exception as e:
+                st.error(f"Could not read archive: {str(e)}")
+                return
+        
+        if not project["selected"]:
+            st.warning("No files in the archive matched the error; try pasting the full stack trace")
+            return
+        
+        st.markdown("#### 📑 File Relevance Ranking")
+        st.caption(
+            f"Sending {len(project['selected'])} of {project['file_count']} files "
+            f"(~{project['tokens']:,} tokens)"
+        )
+        st.dataframe(pd.DataFrame(project["ranking"]), use_container_width=True, hide_index=True)
+        
+        top_file = project["selected"][0]
+        analysis_language = resolve_language(language, error_input, top_file)
+        
+        with st.spinner("🔎 Analyzing project..."):
+            analysis_result = analyze_bug_advanced(
+                client, 
+                project["context"], 
+                "text", 
+                severity, 
+                analysis_language, 
+                complexity, 
+                analysis_depth
+            )
+        
+        bug_entry = make_bug_entry(
+            f"Archive: {uploaded_archive.name}\n{error_text}",
+            analysis_result,
+            severity,
+            analysis_language,
+            complexity,
+            "archive"
+        )
+        entry_id = record_bug_entry(bug_entry)
+        
+        st.markdown("## 🎯 Analysis Results")
+        render_result(entry_id)
+        render_similar_bugs(error_text, entry_id)
+
+# Large log mode: stream the log, cluster error windows, analyze one representative per cluster
+def render_log_upload(client, severity, language, complexity, analysis_depth):
+    st.markdown("""
+    <div class="feature-card">
+        <h4>📜 Analyze a Service Log</h4>
+        <p>Upload a log (plain or .gz). Error windows are extracted while streaming, grouped by fingerprint, and one representative per group is analyzed. Very large logs should be read from the server's log directory (BUGSQA_LOG_DIR) instead of uploaded.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    uploaded_log = st.file_uploader(
+        "Choose a log file:",
+        type=["log", "txt", "out", "err", "gz"],
+        key="log_uploader"
+    )
+    
+    # Operators can point at logs already on the server instead of uploading them; unlike
+    # uploads (buffered in memory), these are streamed from disk in constant memory
+    log_dir = os.environ.get('BUGSQA_LOG_DIR')
+    log_path = None
+    if log_dir:
+        log_name = st.text_input(f"...or a log file name under {log_dir}:", key="log_path")
+        if log_name:
+            candidate = os.path.realpath(os.path.join(log_dir, log_name))
+            if candidate.startswith(os.path.realpath(log_dir) + os.sep) and os.path.isfile(candidate):
+                log_path = candidate
+            else:
+                st.warning("Log file not found in the configured log directory")
+    
+    cluster_limit = st.slider("Clusters to analyze:", min_value=1, max_value=10, value=3, key="log_clusters")
+    
+    if uploaded_log is None and log_path is None:
+        return
+    
+    if st.button("🔍 Scan & Analyze Log", key="analyze_log"):
+        source_name = os.path.basename(log_path) if log_path else uploaded_log.name
+        with st.spinner("📜 Scanning log for error windows..."):
+            scan_start = time.perf_counter()
+            if log_path:
+                with open(log_path, "rb") as log_file:
+                    scan = scan_log(log_file)
+            else:
+                scan = scan_log(uploaded_log)
+            scan_seconds = time.perf_counter() - scan_start
+        
+        st.caption(
+            f"Scanned {scan['lines']:,} lines in {scan_seconds:.1f}s: "
+            f"{scan['windows']:,} error windows in {len(scan['clusters'])} clusters"
+        )
+        if not scan["clusters"]:
+            st.success("No errors or exceptions found in this log")
+            return
+        
+        st.dataframe(
+            pd.DataFrame([
+                {k: c[k] for k in ("count", "signature", "first_line", "last_line", "fingerprint")}
+                for c in scan["clusters"]
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        for rank, cluster in enumerate(scan["clusters"][:cluster_limit], 1):
+            excerpt = compact_trace(cluster_prompt(cluster))["text"]
+            analysis_language = resolve_language(language, cluster["representative"])
+            with st.spinner(f"🧠 Analyzing cluster {rank} ({cluster['count']} occurrences)..."):
+                analysis_result = analyze_bug_advanced(
+                    client, 
+                    excerpt, 
+                    "text", 
+                    severity, 
+                    analysis_language, 
+                    complexity, 
+                    analysis_depth
+                )
+            
+            bug_entry = make_bug_entry(
+                f"Log: {source_name} ({cluster['count']}x)\n{cluster['representative']}",
+                analysis_result,
+                severity,
+                analysis_language,
+                complexity,
+                "log"
+            )
+            entry_id = record_bug_entry(bug_entry)
+            
+            with st.expander(f"🧩 Cluster {rank}: {cluster['signature']} ({cluster['count']}x)", expanded=rank == 1):
+                st.code(cluster["representative"], language="text")
+                render_result(entry_id)
+
+# Follow-up chat on a past analysis; only the new question and recent turns are sent
+def render_followup_chat(client):
+    st.markdown("## 💬 Follow-up Questions")
+    
+    history = st.session_state.bug_history
+    labels = {
+        f"Bug #{i + 1} · {history[i]['severity']} · {history[i]['language']} · {history[i]['timestamp'][:16]}": i
+        for i in reversed(range(len(history)))
+    }
+    entry_id = labels[st.selectbox("Ask about analysis:", list(labels), key="followup_entry")]
+    
+    thread = st.session_state.followups.get(entry_id)
+    if thread is not None:
+        if thread.trimmed_turns:
+            st.caption(f"{thread.trimmed_turns} older messages dropped to keep the conversation within the context window")
+        for role, text in thread.turns:
+            with st.chat_message("user" if role == "user" else "assistant"):
+                st.markdown(text)
+    
+    with st.form("followup_form", clear_on_submit=True):
+        question = st.text_input(
+            "Your follow-up:",
+            placeholder="e.g. What about the async version?",
+            key="followup_question"
+        )
+        submitted = st.form_submit_button("💬 Ask Follow-up")
+    
+    if submitted and question.strip():
+        if thread is None:
+            thread = st.session_state.followups[entry_id] = FollowUpThread(history[entry_id])
+        with st.spinner("🧠 Thinking about your follow-up..."):
+            record_usage = usage_recorder(st.session_state.usage)
+            try:
+                get_rate_limiter().acquire()
+                response = thread.ask(client, MODEL_NAME, get_context_cache(), question.strip())
+            except Exception as e:
+                record_usage(usage_record(MODEL_NAME, ok=False))
+                st.error(f"❌ Follow-up failed: {str(e)}")
+                return
+            record_usage(usage_record(MODEL_NAME, response))
+        
+        with st.chat_message("user"):
+            st.markdown(question.strip())
+        with st.chat_message("assistant"):
+            st.markdown(response.text)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            cached = getattr(usage, "cached_content_token_count", 0) or 0
+            st.caption(f"~{usage.prompt_token_count - cached:,} prompt tokens sent, {cached:,} served from cache")
 
 # Generate comprehensive bug report
 def generate_bug_report():
@@ -1034,41 +1611,8 @@ def generate_bug_report():
         st.warning("No bug history to generate report from")
         return
     
-    # Create report content
-    report_content = f"""
-    # 🐛 Bugs.qa Analysis Report
-    **Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-    **Total Bugs Analyzed:** {len(st.session_state.bug_history)}
-    
-    ## 📊 Summary Statistics
-    - **Success Rate:** {st.session_state.user_satisfaction}%
-    - **Most Common Language:** {max(set(b['language'] for b in st.session_state.bug_history), key=lambda x: list(b['language'] for b in st.session_state.bug_history).count(x))}
-    - **Average Severity:** {sum(1 if b['severity'] == 'Low' else 2 if b['severity'] == 'Medium' else 3 if b['severity'] == 'High' else 4 for b in st.session_state.bug_history) / len(st.session_state.bug_history):.1f}
-    
-    ## 🏆 Top Bug Patterns
-    """
-    
-    # Add bug details
-    for i, bug in enumerate(st.session_state.bug_history, 1):
-        report_content += f"""
-        ### 🐞 Bug #{i}
-        - **Type:** {bug['type']}
-        - **Language:** {bug['language']}
-        - **Severity:** {bug['severity']}
-        - **Date:** {bug['timestamp']}
-        
-        **Input:**
-        ```
-        {bug['input'][:500]}{'...' if len(bug['input']) > 500 else ''}
-        ```
-        
-        **Solution Summary:**
-        {bug['result'].split('##')[0][:300]}...
-        """
-    
-    # Create download link
-    report_hash = hashlib.md5(report_content.encode()).hexdigest()[:8]
-    filename = f"bug_report_{report_hash}.md"
+    report_content = build_report(st.session_state.bug_history, success_rate(st.session_state.usage))
+    filename = report_filename(report_content)
     
     st.markdown("### 📤 Export Report")
     st.download_button(
@@ -1080,9 +1624,19 @@ def generate_bug_report():
 
 # Main app function
 def main():
+    init_session_state()
+    collect_background_usage()
+    st.session_state.profile_modes = profile_modes(st.query_params)
+    if "rerun" in st.session_state.profile_modes:
+        _, report = profile_call("rerun", render_app)
+        keep_profile(report)
+    else:
+        render_app()
+    render_profiles()
+
+def render_app():
     # Initialize everything
     load_custom_css()
-    init_session_state()
     client = init_genai_client()
     
     if client is None:
@@ -1100,22 +1654,18 @@ def main():
     if st.session_state.bug_history:
         st.markdown("## 📜 Bug Analysis History")
         
-        with st.expander("View Recent Bug Analyses", expanded=False):
-            for i, bug in enumerate(reversed(st.session_state.bug_history[-5:]), 1):
-                st.markdown(f"""
-                <div class="feature-card">
-                    <h4>🐛 Bug #{len(st.session_state.bug_history)-i+1} - {bug['severity']} severity in {bug['language']}</h4>
-                    <p><small>{bug['timestamp']}</small></p>
-                    <details>
-                        <summary>View Details</summary>
-                        <div class="solution-box">
-                            {bug['result']}
-                        </div>
-                    </details>
-                </div>
-                """, unsafe_allow_html=True)
+        render_followup_chat(client)
+        
+        render_history_search()
         
-        create_error_visualizations()
+        render_history_page()
+    
+    render_incident_import()
+    
+    create_error_visualizations()
+    
+    # Organization-wide, so shown even before this session has analyzed anything
+    render_trending_errors()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from engine import (
+    IMAGE_EXTENSIONS, MODEL_NAME, analyze_bug, build_report, create_client, extract_code_blocks, is_error_result,
+    make_bug_entry, prepare_text_input, record_entry
+)
+from history_search import build_index
+from image_cache import UploadHandleCache
+from language_detect import AUTO_DETECT, resolve_language
+from prompts import ContextCache
+from rate_limit import RateLimiter
+from shared_cache import create_cache
+from static_check import PRECHECK_MODES, precheck
+from usage import BudgetGovernor, UsageLedger, add_usage, empty_totals
+
+# Headless batch analysis, e.g. for triaging nightly CI failures:
+#   python cli.py failures/*.log -j 8 > results.jsonl
+#   cat failures.jsonl | python cli.py -j 8 --report report.md > results.jsonl
+# Each stdin line is a JSON object with "input" (text) or "path", plus optional "id",
+# "severity", "language", "complexity" and "depth" overriding the command-line defaults.
+# One JSON result per input is written to stdout as soon as it completes.
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+COMPLEXITIES = ["Beginner", "Intermediate", "Advanced"]
+
+
+def iter_requests(paths, stdin):
+    for path in paths:
+        if path != "-":
+            yield {"id": path, "path": path}
+            continue
+        for number, line in enumerate(stdin, 1):
+            if line.strip():
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    request = {"invalid": f"line {number}: {e}"}
+                if not isinstance(request, dict):
+                    request = {"invalid": f"line {number}: expected a JSON object"}
+                request.setdefault("id", f"stdin:{number}")
+                yield request
+
+
+# Error message for a malformed per-request override, or None
+def invalid_fields(request):
+    if "severity" in request and request["severity"] not in SEVERITIES:
+        return f"severity must be one of {', '.join(SEVERITIES)}"
+    if "complexity" in request and request["complexity"] not in COMPLEXITIES:
+        return f"complexity must be one of {', '.join(COMPLEXITIES)}"
+    if "depth" in request:
+        try:
+            depth = int(request["depth"])
+        except (TypeError, ValueError):
+            depth = None
+        if depth not in range(1, 6) or isinstance(request["depth"], (bool, float)):
+            return "depth must be an integer from 1 to 5"
+    for field in ("language", "path"):
+        if field in request and not isinstance(request[field], str):
+            return f"{field} must be a string"
+    return None
+
+
+# Runs on a worker thread; returns the history entry and the output record
+def process_request(request, settings, client, context_cache, upload_cache, rate_limiter, ledger, governor, cache):
+    start = time.perf_counter()
+    usage = empty_totals()
+
+    def record_usage(record):
+        ledger.record(record)
+        add_usage(usage, record)
+
+    problem = request.get("invalid") or invalid_fields(request)
+    if problem:
+        # Fall back to the defaults so the error record can still be built
+        request = {"id": request["id"], "invalid": problem, "input": request.get("input", "")}
+    severity = request.get("severity", settings.severity)
+    language = request.get("language", settings.language)
+    complexity = request.get("complexity", settings.complexity)
+    depth = int(request.get("depth", settings.depth))
+    path = request.get("path")
+    input_type = "text"
+    findings, local_findings, result = [], "", None
+
+    if "invalid" in request:
+        result, analysis_language = f"❌ **Invalid Input:** {request['invalid']}", resolve_language(language)
+    elif path is None and "input" not in request:
+        result, analysis_language = "❌ **Invalid Input:** expected an \"input\" or \"path\" field", resolve_language(language)
+    else:
+        try:
+            if path is not None and path.lower().endswith(IMAGE_EXTENSIONS):
+                with open(path, "rb") as image_file:
+                    bug_input = image_file.read()
+                input_type, analysis_language = "image", resolve_language(language)
+            else:
+                if path is not None:
+                    with open(path, encoding="utf-8", errors="replace") as source_file:
+                        text = source_file.read()
+                else:
+                    text = str(request["input"])
+                # Source files are sent whole, as in the app's File Upload tab; only pasted text is compacted
+                analysis_language, bug_input, _ = prepare_text_input(text, language, settings.compact and path is None, path)
+                findings, local_findings, result = precheck(text, analysis_language, settings.precheck)
+            # A definite error found by the local pre-check in skip mode needs no model call
+            if result is None:
+                model, model_depth = governor.plan(MODEL_NAME, depth)
+                result = analyze_bug(
+                    client, bug_input, input_type, severity, analysis_language, complexity, model_depth,
+                    context_cache=context_cache,
+                    upload_cache=upload_cache,
+                    rate_limiter=rate_limiter,
+                    model=model,
+                    on_usage=record_usage,
+                    cache=cache,
+                    local_findings=local_findings
+                )
+        except OSError as e:
+            result, analysis_language = f"❌ **Input Error:** {str(e)}", resolve_language(language)
+        except Exception as e:
+            # One failing request yields one error record instead of ending the batch
+            result, analysis_language = f"❌ **Analysis Error:** {str(e)}", resolve_language(language)
+
+    label = f"File: {os.path.basename(path)}" if path else str(request.get("input", ""))
+    bug_entry = make_bug_entry(label, result, severity, analysis_language, complexity, input_type)
+    record = {
+        "id": request["id"],
+        "type": input_type,
+        "severity": severity,
+        "language": analysis_language,
+        "complexity": complexity,
+        "depth": depth,
+        "error": is_error_result(result),
+        "result": result,
+        "code_blocks": extract_code_blocks(result),
+        "findings": findings,
+        "usage": {key: usage[key] for key in ("input_tokens", "output_tokens", "cached_tokens")},
+        "cost": round(usage["cost"], 6),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    return bug_entry, record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze bugs without the Streamlit UI; writes JSONL to stdout.")
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="Files to analyze; '-' (the default) reads JSONL requests from stdin")
+    parser.add_argument("-j", "--parallel", type=int, default=4, help="Concurrent analyses")
+    parser.add_argument("--severity", choices=SEVERITIES, default="Medium")
+    parser.add_argument("--language", default=AUTO_DETECT)
+    parser.add_argument("--complexity", choices=COMPLEXITIES, default="Intermediate")
+    parser.add_argument("--depth", type=int, choices=range(1, 6), default=3)
+    parser.add_argument("--no-compact", dest="compact", action="store_false",
+                        help="Send stdin input text as-is instead of compacting it (files are never compacted)")
+    parser.add_argument("--precheck", choices=PRECHECK_MODES, default="attach",
+                        help="Local static checks: attach findings to the prompt, skip the model on definite errors, or off")
+    parser.add_argument("--report", help="Also write a Markdown report of the run to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        client = create_client()
+    except Exception as e:
+        print(f"Failed to initialize AI client: {e}", file=sys.stderr)
+        return 2
+
+    context_cache = ContextCache()
+    upload_cache = UploadHandleCache()
+    rate_limiter = RateLimiter()
+    ledger = UsageLedger()
+    governor = BudgetGovernor(ledger)
+    cache = create_cache()
+    history = []
+    index = build_index(history)
+    errors = 0
+
+    def emit(future):
+        nonlocal errors
+        bug_entry, record = future.result()
+        record_entry(history, index, bug_entry)
+        errors += record["error"]
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    # Bounded number of requests in flight, so large stdin streams are not read up front
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as executor:
+        pending = set()
+        for request in iter_requests(args.inputs, sys.stdin):
+            pending.add(executor.submit(
+                process_request, request, args, client, context_cache, upload_cache, rate_limiter, ledger, governor, cache
+            ))
+            if len(pending) >= args.parallel * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    emit(future)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                emit(future)
+
+    totals = ledger.totals()
+    if args.report and history:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            report_file.write(build_report(history, 100.0 * (len(history) - errors) / len(history)))
+
+    print(
+        f"{len(history)} analyzed, {errors} failed; {totals['input_tokens']:,} tokens in, "
+        f"{totals['output_tokens']:,} out, ~${totals['cost']:.4f}",
+        file=sys.stderr
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import as_completed
+from datetime import datetime
+from functools import partial
+
+import google.generativeai as genai
+
+from history_search import entry_text
+from image_cache import image_content_part
+from language_detect import resolve_language, highlight_name
+from prompts import CORE_SECTIONS, FANOUT_SECTIONS, get_template
+from stub_backend import StubClient
+from trace_compaction import compact_trace
+from usage import usage_record
+
+# UI-independent analysis engine shared by the Streamlit app (bugs.py) and the CLI (cli.py):
+# client setup, prompt building, the model call, result parsing, history and reports.
+
+MODEL_NAME = "gemini-2.0-flash"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+CODE_BLOCK_PATTERN = re.compile(r'```.*?\n(.*?)\n```', re.DOTALL)
+# Analyses at this depth or deeper are split into concurrent section requests when an executor is given
+FANOUT_MIN_DEPTH = 4
+SECTION_WORKERS = 16
+SECTION_PENDING = "_⏳ Generating..._"
+SECTION_FAILED = "⚠️ This section could not be generated"
+
+
+# Raises instead of reporting, so each front end can surface the error its own way
+def create_client():
+    # Offline stand-in backend for load tests and local development
+    if os.environ.get('BUGSQA_MODEL_BACKEND') == 'stub':
+        return StubClient()
+
+    api_key = os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        raise RuntimeError("Google API key not found. Please set the GOOGLE_API_KEY in your environment variables or Streamlit secrets.")
+
+    genai.configure(api_key=api_key)
+    return genai
+
+
+# Language and (optionally compacted) prompt text for a pasted bug
+def prepare_text_input(bug_text, language, compact_input=True, filename=None):
+    analysis_language = resolve_language(language, bug_text, filename)
+    if not compact_input:
+        return analysis_language, bug_text, None
+    compaction = compact_trace(bug_text)
+    return analysis_language, compaction["text"], compaction
+
+
+# Identical input and settings give the same analysis on any replica
+def analysis_cache_key(bug_input, input_type, severity, language, complexity, analysis_depth, model=MODEL_NAME):
+    template = get_template("text_analysis" if input_type == "text" else "image_analysis")
+    data = bug_input if isinstance(bug_input, bytes) else bug_input.encode("utf-8")
+    return (
+        f"analysis:{template.key}:{model}:{severity}:{language}:{complexity}:{analysis_depth}:"
+        f"{hashlib.sha256(data).hexdigest()}"
+    )
+
+
+# on_usage, if given, receives one usage record (see usage.py) per model call; with a
+# shared cache (see shared_cache.py) successful analyses are reused across replicas.
+# With an executor, deep text analyses are split into concurrent section requests.
+# local_findings is the static_check.format_findings block for text input, if any.
+def analyze_bug(client, bug_input, input_type, severity, language, complexity, analysis_depth,
+                context_cache, upload_cache=None, rate_limiter=None, fingerprint=None,
+                model=MODEL_NAME, on_usage=None, cache=None, executor=None, on_progress=None,
+                local_findings=""):
+    fanout = executor is not None and input_type == "text" and analysis_depth >= FANOUT_MIN_DEPTH
+    if cache is not None:
+        return cache.get_or_compute(
+            analysis_cache_key(bug_input, input_type, severity, language, complexity, analysis_depth, model)
+            + (":sections" if fanout else "")
+            + (f":findings:{hashlib.sha256(local_findings.encode('utf-8')).hexdigest()[:16]}" if local_findings else ""),
+            lambda: analyze_bug(
+                client, bug_input, input_type, severity, language, complexity, analysis_depth,
+                context_cache, upload_cache, rate_limiter, fingerprint, model, on_usage,
+                executor=executor, on_progress=on_progress, local_findings=local_findings
+            ),
+            # A result with missing sections is shown once but not reused
+            cacheable=lambda result: not is_error_result(result) and SECTION_FAILED not in result
+        )
+    if fanout:
+        return analyze_sections(
+            client, bug_input, severity, language, complexity, analysis_depth, context_cache, executor,
+            rate_limiter, model, on_usage, on_progress, local_findings
+        )
+
+    template = get_template("text_analysis" if input_type == "text" else "image_analysis")
+    try:
+        return _generate(
+            client, template, input_type, bug_input, context_cache, upload_cache, rate_limiter, fingerprint,
+            model, on_usage, severity=severity, language=language, complexity=complexity,
+            analysis_depth=analysis_depth, local_findings=local_findings
+        )
+    except Exception as e:
+        return f"❌ **Analysis Error:** {str(e)}\n\nPlease check your input and try again."
+
+
+# One model call for a template; raises on failure after recording it in on_usage
+def _generate(client, template, input_type, bug_input, context_cache, upload_cache, rate_limiter, fingerprint,
+              model, on_usage, **values):
+    try:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        variable_prompt = template.render(
+            fence=highlight_name(values["language"]),
+            input_type=input_type,
+            bug_input=bug_input if input_type == "text" else "",
+            **values
+        )
+
+        if input_type == "text":
+            contents = variable_prompt
+        else:  # image input
+            # Inline small images, reuse previously uploaded handles for larger ones
+            image_part = image_content_part(client, bug_input, upload_cache, fingerprint)
+            contents = [image_part, variable_prompt]
+
+        # The static instruction prefix is served from a model-side context cache when possible
+        config = context_cache.generation_config(client, model, template)
+        try:
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+        except Exception:
+            if "cached_content" not in config:
+                raise
+            # The cache may have been evicted server-side; retry once with the prefix inline
+            context_cache.invalidate(model, template)
+            response = client.models.generate_content(
+                model=model,
+                contents=contents,
+                config={"system_instruction": template.static_prefix}
+            )
+
+        if on_usage is not None:
+            on_usage(usage_record(model, response))
+        return response.text
+
+    except Exception:
+        if on_usage is not None:
+            on_usage(usage_record(model, ok=False))
+        raise
+
+
+# Merged markdown in layout order; sections still running show a placeholder
+def merge_sections(core, sections):
+    parts = [core if core is not None else f"{CORE_SECTIONS[0][0]}\n{SECTION_PENDING}"]
+    for (heading, _), text in zip(FANOUT_SECTIONS, sections):
+        if text is None:
+            parts.append(f"{heading}\n{SECTION_PENDING}")
+        elif text.lstrip().startswith(heading):
+            parts.append(text.strip())
+        else:
+            parts.append(f"{heading}\n{text.strip()}")
+    return "\n\n".join(part.strip() for part in parts)
+
+
+# Core sections and each independent section as concurrent requests sharing the same
+# context; on_progress gets the merged markdown (on the calling thread) as each completes.
+# A failed section is replaced by a note; only a failed core fails the analysis.
+def analyze_sections(client, bug_input, severity, language, complexity, analysis_depth, context_cache, executor,
+                     rate_limiter=None, model=MODEL_NAME, on_usage=None, on_progress=None, local_findings=""):
+    if on_usage is not None:
+        usage_lock = threading.Lock()
+        record_usage = on_usage
+
+        def on_usage(record):
+            with usage_lock:
+                record_usage(record)
+
+    values = dict(severity=severity, language=language, complexity=complexity, analysis_depth=analysis_depth,
+                  local_findings=local_findings)
+    request = partial(_generate, client, input_type="text", bug_input=bug_input, context_cache=context_cache,
+                      upload_cache=None, rate_limiter=rate_limiter, fingerprint=None, model=model, on_usage=on_usage)
+    core_future = executor.submit(request, get_template("text_analysis_core"), **values)
+    section_futures = [
+        executor.submit(request, get_template("text_analysis_section"), section=heading.lstrip("# "), **values)
+        for heading, _ in FANOUT_SECTIONS
+    ]
+    positions = {future: index for index, future in enumerate(section_futures)}
+
+    core, sections = None, [None] * len(FANOUT_SECTIONS)
+    for future in as_completed([core_future] + section_futures):
+        try:
+            text = future.result()
+        except Exception as e:
+            if future is core_future:
+                for pending in section_futures:
+                    pending.cancel()
+                return f"❌ **Analysis Error:** {str(e)}\n\nPlease check your input and try again."
+            text = f"_{SECTION_FAILED} ({str(e)[:200]})._"
+        if future is core_future:
+            core = text
+        else:
+            sections[positions[future]] = text
+        if on_progress is not None:
+            on_progress(merge_sections(core, sections))
+    return merge_sections(core, sections)
+
+
+def is_error_result(result):
+    return result.startswith("❌")
+
+
+def extract_code_blocks(result):
+    return CODE_BLOCK_PATTERN.findall(result)
+
+
+def make_bug_entry(bug_input, result, severity, language, complexity, input_type):
+    return {
+        "input": bug_input,
+        "result": result,
+        "severity": severity,
+        "language": language,
+        "complexity": complexity,
+        "timestamp": datetime.now().isoformat(),
+        "type": input_type
+    }
+
+
+# Store an analysis in history and keep the search index in sync
+def record_entry(history, index, bug_entry):
+    history.append(bug_entry)
+    return index.add(
+        entry_text(bug_entry),
+        bug_entry['language'],
+        bug_entry['severity'],
+        bug_entry['timestamp']
+    )
+
+
+def build_report(history, success_rate):
+    report_content = f"""
+    # 🐛 Bugs.qa Analysis Report
+    **Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    **Total Bugs Analyzed:** {len(history)}
+
+    ## 📊 Summary Statistics
+    - **Success Rate:** {"n/a" if success_rate is None else f"{success_rate:.1f}%"}
+    - **Most Common Language:** {max(set(b['language'] for b in history), key=lambda x: list(b['language'] for b in history).count(x))}
+    - **Average Severity:** {sum(1 if b['severity'] == 'Low' else 2 if b['severity'] == 'Medium' else 3 if b['severity'] == 'High' else 4 for b in history) / len(history):.1f}
+
+    ## 🏆 Top Bug Patterns
+    """
+
+    # Add bug details
+    for i, bug in enumerate(history, 1):
+        report_content += f"""
+        ### 🐞 Bug #{i}
+        - **Type:** {bug['type']}
+        - **Language:** {bug['language']}
+        - **Severity:** {bug['severity']}
+        - **Date:** {bug['timestamp']}
+
+        **Input:**
+        ```
+        {bug['input'][:500]}{'...' if len(bug['input']) > 500 else ''}
+        ```
+
+        **Solution Summary:**
+        {bug['result'].split('##')[0][:300]}...
+        """
+    return report_content
+
+
+def report_filename(report_content):
+    return f"bug_report_{hashlib.md5(report_content.encode()).hexdigest()[:8]}.md"
@@ -0,0 +1,77 @@
+import hashlib
+
+from prompts import get_template
+from trace_compaction import compact_trace, estimate_tokens
+
+# Follow-up chat under a finished analysis. The original input and the analysis form a
+# fixed system context (served from the context cache when large enough); each follow-up
+# sends only the new question plus the recent turns that fit in the token window.
+
+FOLLOWUP_WINDOW_TOKENS = 4000
+# Entry types whose input is a pasted trace or log excerpt worth compacting
+COMPACTED_INPUT_TYPES = ("text", "archive", "log")
+
+
+def entry_context(bug_entry):
+    bug_input = bug_entry['input']
+    if bug_entry['type'] in COMPACTED_INPUT_TYPES:
+        bug_input = compact_trace(bug_input)["text"]
+    return get_template("followup").render(
+        input_type=bug_entry['type'],
+        language=bug_entry['language'],
+        bug_input=bug_input,
+        analysis=bug_entry['result']
+    )
+
+
+class FollowUpThread:
+    def __init__(self, bug_entry):
+        template = get_template("followup")
+        self.system_instruction = f"{template.static_prefix}\n\n{entry_context(bug_entry)}"
+        self.context_key = f"{template.key}:{hashlib.sha1(self.system_instruction.encode()).hexdigest()[:16]}"
+        self.context_tokens = estimate_tokens(self.system_instruction)
+        # Compact conversation state: (role, text) pairs, oldest first
+        self.turns = []
+        self.trimmed_turns = 0
+        self.chat = None
+        self.chat_config = None
+
+    def window_tokens(self):
+        return sum(estimate_tokens(text) for _, text in self.turns)
+
+    # Drop the oldest question/answer pairs until the history fits the window
+    def trim(self, window):
+        trimmed = False
+        while len(self.turns) > 2 and self.window_tokens() > window:
+            del self.turns[:2]
+            self.trimmed_turns += 2
+            trimmed = True
+        if trimmed:
+            self.chat = None
+
+    # The live chat session is rebuilt from the compact turns whenever its config
+    # changes (cache created or expired) or the history was trimmed
+    def _chat(self, client, model, config):
+        if self.chat is None or config != self.chat_config:
+            history = [{"role": role, "parts": [{"text": text}]} for role, text in self.turns]
+            self.chat = client.chats.create(model=model, config=config, history=history)
+            self.chat_config = config
+        return self.chat
+
+    def ask(self, client, model, context_cache, question, window=FOLLOWUP_WINDOW_TOKENS):
+        config = context_cache.config_for(
+            client, model, self.context_key, self.system_instruction, self.context_tokens
+        )
+        try:
+            response = self._chat(client, model, config).send_message(question)
+        except Exception:
+            if "cached_content" not in config:
+                raise
+            # The cache may have been evicted server-side; retry once with the context inline
+            context_cache.invalidate(model, self.context_key)
+            response = self._chat(client, model, {"system_instruction": self.system_instruction}).send_message(question)
+
+        self.turns.append(("user", question))
+        self.turns.append(("model", response.text))
+        self.trim(window)
+        return response
@@ -0,0 +1,131 @@
+import re
+import threading
+import time
+
+from log_ingest import is_trigger, normalize_line
+
+# Process-wide "what's breaking right now": Space-Saving top-k summaries of error
+# signatures in rotating time buckets. Each window is a fixed ring of buckets and each
+# bucket keeps at most CAPACITY counters, so memory does not grow with traffic.
+
+CAPACITY = 64
+MAX_SIGNATURES_PER_INPUT = 5
+MAX_SIGNATURE_CHARS = 120
+# name: (bucket width in seconds, number of buckets)
+WINDOWS = {
+    "hour": (300, 12),
+    "day": (3600, 24),
+    "week": (6 * 3600, 28),
+}
+ERROR_KEYWORDS = ('error', 'exception', 'failed', 'undefined', 'null')
+WORD_PATTERN = re.compile(r"[\w.:$'\"-]+")
+
+
+# Normalized trigger lines (error type + message shape); falls back to error-like words
+def error_signatures(text):
+    signatures = []
+    for line in text.splitlines():
+        if is_trigger(line) and not line.lstrip().startswith("Traceback"):
+            signature = normalize_line(line)[:MAX_SIGNATURE_CHARS]
+            if signature and signature not in signatures:
+                signatures.append(signature)
+                if len(signatures) >= MAX_SIGNATURES_PER_INPUT:
+                    return signatures
+    if signatures:
+        return signatures
+    for word in WORD_PATTERN.findall(text.lower()):
+        if any(keyword in word for keyword in ERROR_KEYWORDS):
+            signature = normalize_line(word.strip(".:'\""))[:MAX_SIGNATURE_CHARS]
+            if signature and signature not in signatures:
+                signatures.append(signature)
+                if len(signatures) >= MAX_SIGNATURES_PER_INPUT:
+                    break
+    return signatures
+
+
+# Space-Saving: at most `capacity` counters; a new key replaces the smallest one and
+# inherits its count as the overestimation bound
+class SpaceSaving:
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.counters = {}
+
+    def add(self, key, weight=1):
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0]
+        else:
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[key] = [floor + weight, floor]
+
+    # Keys absent from a full summary may have occurred up to this many times
+    def floor(self):
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+
+
+class HeavyHitters:
+    def __init__(self, capacity=CAPACITY, windows=WINDOWS):
+        self.capacity = capacity
+        self.windows = windows
+        # window name -> ring of [bucket_id, SpaceSaving]
+        self.rings = {name: [[None, None] for _ in range(slots)] for name, (_, slots) in windows.items()}
+        self.lock = threading.Lock()
+
+    def add(self, signature, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            for name, (width, slots) in self.windows.items():
+                bucket_id = int(timestamp // width)
+                slot = self.rings[name][bucket_id % slots]
+                if slot[0] is None or bucket_id > slot[0]:
+                    slot[0], slot[1] = bucket_id, SpaceSaving(self.capacity)
+                elif bucket_id < slot[0]:
+                    # Older than this window reaches
+                    continue
+                slot[1].add(signature)
+
+    # Merged (signature, count, error) for the window, highest counts first. For a key
+    # missing from a bucket, that bucket's floor is added to the error bound.
+    def top(self, window, k=10, now=None):
+        now = time.time() if now is None else now
+        width, slots = self.windows[window]
+        current = int(now // width)
+        with self.lock:
+            summaries = [
+                summary for bucket_id, summary in self.rings[window]
+                if bucket_id is not None and current - slots < bucket_id <= current
+            ]
+            merged = {}
+            for summary in summaries:
+                for key, (count, error) in summary.counters.items():
+                    entry = merged.setdefault(key, [0, 0])
+                    entry[0] += count
+                    entry[1] += error
+            for key, entry in merged.items():
+                entry[1] += sum(s.floor() for s in summaries if key not in s.counters)
+        ranked = sorted(merged.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(key, count, error) for key, (count, error) in ranked[:k]]
+
+    # Signatures whose last-hour count is high relative to their daily average rate
+    def trending(self, k=10, now=None):
+        hour = self.top("hour", k=self.capacity, now=now)
+        day = {key: count for key, count, _ in self.top("day", k=self.capacity, now=now)}
+        week = {key: count for key, count, _ in self.top("week", k=self.capacity, now=now)}
+        rows = []
+        for key, count, error in hour:
+            hourly_baseline = max(day.get(key, count) / 24.0, 1.0)
+            rows.append({
+                "signature": key,
+                "last hour": count,
+                "last day": day.get(key, count),
+                "last week": week.get(key, count),
+                "trend": round(count / hourly_baseline, 1),
+                "± bound": error,
+            })
+        rows.sort(key=lambda row: (-row["trend"], -row["last hour"]))
+        return rows[:k]
@@ -0,0 +1,130 @@
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+import numpy as np
+
+# Incremental BM25 inverted index over bug history entries.
+# Documents are added in chronological order, so doc ids double as a time index.
+# Postings are appended to Python lists and converted to numpy arrays lazily, so
+# scoring a term costs one vectorised pass over its postings.
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9_]{2,}')
+STOPWORDS = frozenset(
+    "the and for with this that from are was were not but you your have has had its "
+    "can will into out all any use using get got when what how why then than there here "
+    "line file".split()
+)
+MAX_QUERY_TERMS = 32
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class HistoryIndex:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = []
+        self.total_length = 0
+        self.timestamps = []
+        self.by_language = {}
+        self.by_severity = {}
+        self._array_cache = {}
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    # Index one entry; returns its doc id (position in the history list)
+    def add(self, text, language=None, severity=None, timestamp=""):
+        doc_id = len(self.doc_lengths)
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            ids, tfs = self.postings.setdefault(term, ([], []))
+            ids.append(doc_id)
+            tfs.append(tf)
+        length = sum(terms.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        self.timestamps.append(timestamp)
+        self.by_language.setdefault(language, []).append(doc_id)
+        self.by_severity.setdefault(severity, []).append(doc_id)
+        return doc_id
+
+    # Numpy view of a posting list, rebuilt only after it has grown
+    def _arrays(self, key, ids, tfs=None):
+        cached = self._array_cache.get(key)
+        if cached is None or len(cached[0]) != len(ids):
+            cached = (np.asarray(ids, dtype=np.int64),
+                      None if tfs is None else np.asarray(tfs, dtype=np.float64))
+            self._array_cache[key] = cached
+        return cached
+
+    # Boolean mask of documents passing the filters, or None for "no restriction"
+    def _mask(self, doc_count, language, severity, start, end):
+        mask = None
+        for field, value, groups in (("language", language, self.by_language),
+                                     ("severity", severity, self.by_severity)):
+            if not value:
+                continue
+            field_mask = np.zeros(doc_count, dtype=bool)
+            ids = groups.get(value)
+            if ids:
+                field_mask[self._arrays((field, value), ids)[0]] = True
+            mask = field_mask if mask is None else mask & field_mask
+        if start or end:
+            low = bisect_left(self.timestamps, start) if start else 0
+            high = bisect_right(self.timestamps, end) if end else doc_count
+            range_mask = np.zeros(doc_count, dtype=bool)
+            range_mask[low:high] = True
+            mask = range_mask if mask is None else mask & range_mask
+        return mask
+
+    def search(self, query, k=10, language=None, severity=None, start=None, end=None, exclude=()):
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if len(terms) > MAX_QUERY_TERMS:
+            # Long queries (e.g. a whole pasted trace): keep the rarest terms
+            terms = sorted(terms, key=lambda term: len(self.postings[term][0]))[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+
+        lengths = self._arrays(("lengths",), self.doc_lengths)[0]
+        avg_length = self.total_length / doc_count or 1.0
+        scores = np.zeros(doc_count)
+        for term in terms:
+            ids, tfs = self._arrays(term, *self.postings[term])
+            df = len(ids)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[ids] / avg_length)
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+        mask = self._mask(doc_count, language, severity, start, end)
+        if mask is not None:
+            scores[~mask] = 0.0
+        for doc_id in exclude:
+            if 0 <= doc_id < doc_count:
+                scores[doc_id] = 0.0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in ranked]
+
+
+def entry_text(bug_entry):
+    return f"{bug_entry['input']}\n{bug_entry['result']}"
+
+
+def build_index(bug_history):
+    index = HistoryIndex()
+    for entry in bug_history:
+        index.add(entry_text(entry), entry['language'], entry['severity'], entry['timestamp'])
+    return index
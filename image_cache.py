@@ -0,0 +1,94 @@
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+# Screenshot dedupe: exact-match reuse of analyses of the same screenshot, and
+# content-hash keyed reuse of uploaded file handles.
+
+INLINE_MAX_BYTES = 512 * 1024
+# Uploaded files expire after 48h on the API side; stop reusing them a little earlier
+UPLOAD_TTL_SECONDS = 47 * 3600
+
+
+# Hash of the decoded pixels and dimensions: the same screenshot re-saved with other
+# metadata or compression matches, while any changed pixel does not. Perceptual hashes
+# are not used because screenshots of different errors on the same background collide.
+def pixel_hash(image):
+    image = image.convert("RGBA")
+    digest = hashlib.sha256(f"{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_image(image_bytes):
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        mime_type = Image.MIME.get(image.format, "image/png")
+        pixels = pixel_hash(image)
+    return {
+        "sha256": hashlib.sha256(image_bytes).hexdigest(),
+        "pixels": pixels,
+        "mime_type": mime_type,
+        "size": len(image_bytes),
+    }
+
+
+# Bounded LRU of past image analyses, matched on identical file bytes or identical pixels
+class ImageAnalysisCache:
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, fingerprint, params):
+        with self.lock:
+            for key in ((fingerprint["sha256"], params), (fingerprint["pixels"], params)):
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    return self.entries[key]
+            return None
+
+    def store(self, fingerprint, params, result):
+        with self.lock:
+            for key in ((fingerprint["sha256"], params), (fingerprint["pixels"], params)):
+                self.entries[key] = result
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+# Uploaded file handles keyed by content hash until they expire
+class UploadHandleCache:
+    def __init__(self, ttl=UPLOAD_TTL_SECONDS):
+        self.ttl = ttl
+        self.handles = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.uploads = 0
+
+    def get_or_upload(self, client, image_bytes, sha256=None, mime_type="image/png"):
+        sha256 = sha256 or hashlib.sha256(image_bytes).hexdigest()
+        now = time.time()
+        with self.lock:
+            cached = self.handles.get(sha256)
+            if cached and cached[1] > now:
+                self.hits += 1
+                return cached[0]
+        handle = client.files.upload(file=io.BytesIO(image_bytes), config={"mime_type": mime_type})
+        with self.lock:
+            self.handles[sha256] = (handle, now + self.ttl)
+            self.uploads += 1
+            for key in [k for k, (_, expires) in self.handles.items() if expires <= now]:
+                del self.handles[key]
+        return handle
+
+
+# Small images travel inline with the request; larger ones reuse an uploaded handle
+def image_content_part(client, image_bytes, upload_cache, fingerprint=None):
+    fingerprint = fingerprint or fingerprint_image(image_bytes)
+    if fingerprint["size"] <= INLINE_MAX_BYTES:
+        return {"inline_data": {"mime_type": fingerprint["mime_type"], "data": image_bytes}}
+    return upload_cache.get_or_upload(client, image_bytes, fingerprint["sha256"], fingerprint["mime_type"])
@@ -0,0 +1,197 @@
+import io
+import threading
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Typed columnar store of incidents for the analytics dashboard. Imported archives
+# (JSONL or Parquet) and live analyses share one DataFrame with categorical language,
+# severity and type columns and datetime64 timestamps, kept sorted by time. Daily
+# rollups per dimension are maintained on insert; weekly ones are derived from them.
+
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+DIMENSIONS = ("severity", "language")
+# Accepted source field names for each column
+COLUMN_ALIASES = {
+    "timestamp": ("timestamp", "time", "created_at", "date", "ts"),
+    "language": ("language", "lang"),
+    "severity": ("severity", "level", "priority"),
+    "type": ("type", "input_type", "source"),
+}
+# Live entries are buffered and converted in batches
+FLUSH_EVERY = 256
+
+
+def empty_frame():
+    return pd.DataFrame({
+        "timestamp": pd.Series([], dtype="datetime64[ns]"),
+        "language": pd.Categorical([]),
+        "severity": pd.Categorical([], categories=SEVERITIES, ordered=True),
+        "type": pd.Categorical([]),
+    })
+
+
+def _parse_timestamps(column):
+    if pd.api.types.is_numeric_dtype(column):
+        # Epoch seconds, or milliseconds for values past the year 5138
+        unit = "ms" if column.dropna().abs().max() > 1e11 else "s"
+        return pd.to_datetime(column, unit=unit, errors="coerce")
+    parsed = pd.to_datetime(column, errors="coerce", utc=True, format="ISO8601")
+    return parsed.dt.tz_localize(None)
+
+
+# Raw records (any of the aliases above) -> typed frame sorted by timestamp
+def normalize_frame(raw):
+    columns = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        source = next((alias for alias in aliases if alias in raw.columns), None)
+        columns[name] = raw[source] if source is not None else pd.Series([None] * len(raw), index=raw.index)
+
+    severity = columns["severity"].astype("string").str.strip().str.capitalize()
+    frame = pd.DataFrame({
+        "timestamp": _parse_timestamps(columns["timestamp"]),
+        "language": columns["language"].astype("string").str.strip().fillna("Other").astype("category"),
+        "severity": pd.Categorical(severity, categories=SEVERITIES, ordered=True),
+        "type": columns["type"].astype("string").fillna("import").astype("category"),
+    })
+    frame = frame.dropna(subset=["timestamp"])
+    return frame.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def read_incidents(fileobj, filename):
+    if filename.lower().endswith(".parquet"):
+        try:
+            raw = pd.read_parquet(fileobj)
+        except ImportError:
+            raise ValueError("Parquet import needs pyarrow; install it or export the archive as JSONL")
+    else:
+        data = fileobj.read()
+        raw = pd.read_json(io.BytesIO(data), lines=not data.lstrip().startswith(b"["))
+    return normalize_frame(raw)
+
+
+def _concat(frames):
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty_frame()
+    if len(frames) == 1:
+        return frames[0]
+    combined = {"timestamp": pd.concat([frame["timestamp"] for frame in frames], ignore_index=True)}
+    for name in ("language", "severity", "type"):
+        combined[name] = union_categoricals([frame[name].array for frame in frames], ignore_order=name != "severity")
+    combined["severity"] = combined["severity"].set_categories(SEVERITIES, ordered=True)
+    return pd.DataFrame(combined)
+
+
+def _daily_rollup(frame, dimension):
+    days = frame["timestamp"].dt.floor("D")
+    return frame.groupby([days, frame[dimension]], observed=True).size().unstack(fill_value=0)
+
+
+# Incidents per day regardless of dimension values (missing or unknown severities included)
+def _daily_totals(frame):
+    return frame.groupby(frame["timestamp"].dt.floor("D")).size()
+
+
+class IncidentStore:
+    def __init__(self, frame=None):
+        self.frame = empty_frame() if frame is None else frame
+        self.daily = {dimension: _daily_rollup(self.frame, dimension) for dimension in DIMENSIONS}
+        self.daily_total = _daily_totals(self.frame)
+        self.weekly = {}
+        self.pending = []
+        self.lock = threading.Lock()
+
+    # Shares the (never mutated in place) frame and rollups with the copy
+    def copy(self):
+        with self.lock:
+            self._flush()
+            clone = IncidentStore.__new__(IncidentStore)
+            clone.frame, clone.daily, clone.weekly = self.frame, dict(self.daily), dict(self.weekly)
+            clone.daily_total = self.daily_total
+            clone.pending, clone.lock = [], threading.Lock()
+            return clone
+
+    def __len__(self):
+        return len(self.frame) + len(self.pending)
+
+    def append(self, bug_entry):
+        with self.lock:
+            self.pending.append({key: bug_entry[key] for key in ("timestamp", "language", "severity", "type")})
+            if len(self.pending) >= FLUSH_EVERY:
+                self._flush()
+
+    def extend(self, frame):
+        with self.lock:
+            self._flush()
+            self._add(frame)
+
+    def _flush(self):
+        if self.pending:
+            frame = normalize_frame(pd.DataFrame(self.pending))
+            self.pending = []
+            self._add(frame)
+
+    def _add(self, frame):
+        if not len(frame):
+            return
+        in_order = not len(self.frame) or frame["timestamp"].iloc[0] >= self.frame["timestamp"].iloc[-1]
+        combined = _concat([self.frame, frame])
+        if not in_order:
+            combined = combined.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        self.frame = combined
+        for dimension in DIMENSIONS:
+            self.daily[dimension] = (
+                self.daily[dimension].add(_daily_rollup(frame, dimension), fill_value=0).fillna(0).astype("int64")
+            )
+        self.daily_total = self.daily_total.add(_daily_totals(frame), fill_value=0).astype("int64")
+        self.weekly = {}
+
+    def _snapshot(self):
+        with self.lock:
+            self._flush()
+            return self.frame, self.daily, self.weekly
+
+    def date_bounds(self):
+        frame, _, _ = self._snapshot()
+        if not len(frame):
+            return None, None
+        return frame["timestamp"].iloc[0].date(), frame["timestamp"].iloc[-1].date()
+
+    # Per-period counts of one dimension; freq "D" or "W" (weeks starting Monday)
+    def rollup(self, dimension, freq="D"):
+        _, daily, weekly = self._snapshot()
+        if freq == "D":
+            return daily[dimension]
+        if dimension not in weekly:
+            weekly[dimension] = daily[dimension].resample("W-MON", label="left", closed="left").sum()
+        return weekly[dimension]
+
+    def counts(self, dimension, start=None, end=None):
+        window = self.rollup(dimension).loc[_bound(start):_bound(end)]
+        return window.sum().astype("int64").sort_values(ascending=False)
+
+    def timeline(self, start=None, end=None, freq="D"):
+        with self.lock:
+            self._flush()
+            totals = self.daily_total.loc[_bound(start):_bound(end)]
+        if freq == "W":
+            totals = totals.resample("W-MON", label="left", closed="left").sum()
+        return totals.astype("int64")
+
+    def total(self, start=None, end=None):
+        return int(self.timeline(start, end).sum())
+
+    # Newest incidents in the range, located by binary search on the sorted timestamps
+    def incidents(self, start=None, end=None, limit=100):
+        frame, _, _ = self._snapshot()
+        timestamps = frame["timestamp"].values
+        low = 0 if start is None else timestamps.searchsorted(pd.Timestamp(start).to_datetime64(), "left")
+        high = len(frame) if end is None else timestamps.searchsorted(
+            (pd.Timestamp(end) + pd.Timedelta(days=1)).to_datetime64(), "left"
+        )
+        return frame.iloc[max(low, high - limit):high].iloc[::-1]
+
+
+def _bound(day):
+    return None if day is None else pd.Timestamp(day)
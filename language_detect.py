@@ -0,0 +1,173 @@
+import os
+import re
+from collections import Counter
+
+# Local language detection for the "Auto-detect" option: file extension, shebang,
+# trace formats, then weighted keyword frequencies. Names match the sidebar options.
+
+AUTO_DETECT = "Auto-detect"
+FALLBACK_LANGUAGE = "Other"
+SCAN_LIMIT = 2000
+
+EXTENSION_MAP = {
+    ".py": "Python", ".pyw": "Python", ".ipynb": "Python",
+    ".js": "JavaScript", ".mjs": "JavaScript", ".cjs": "Node.js", ".ts": "JavaScript",
+    ".jsx": "React", ".tsx": "React",
+    ".java": "Java", ".kt": "Java", ".scala": "Java",
+    ".cpp": "C++", ".cc": "C++", ".cxx": "C++", ".hpp": "C++", ".h": "C++", ".c": "C++",
+    ".cs": "C#",
+    ".go": "Go",
+    ".rs": "Rust",
+    ".php": "PHP",
+    ".rb": "Ruby",
+    ".dart": "Flutter",
+    ".html": "HTML/CSS", ".htm": "HTML/CSS", ".css": "HTML/CSS", ".scss": "HTML/CSS",
+    ".sql": "SQL",
+}
+
+SHEBANG_MAP = (
+    ("python", "Python"),
+    ("node", "Node.js"),
+    ("ruby", "Ruby"),
+    ("php", "PHP"),
+)
+
+# Trace/error formats are near-certain signals, checked in order; the regex only
+# runs when one of the cheap substring guards is present
+TRACE_SIGNATURES = (
+    ("Python", ("Traceback", '.py"'),
+     re.compile(r'Traceback \(most recent call last\)|File "[^"]+\.py", line \d+')),
+    ("Go", ("goroutine",),
+     re.compile(r'goroutine \d+ \[\w+|^panic: .+\n+goroutine', re.MULTILINE)),
+    ("Rust", ("panicked at", "error[E"),
+     re.compile(r"thread '[^']+' panicked at|error\[E\d{4}\]")),
+    ("C#", (".cs:line", "System."),
+     re.compile(r'\bat [\w.]+\(.*\) in .+\.cs:line \d+|System\.\w+Exception')),
+    ("Java", (".java:", ".kt:", ".scala:", "Exception in thread"),
+     re.compile(r'^\s*at [\w$.]+\([\w$]+\.(?:java|kt|scala):\d+\)|Exception in thread "', re.MULTILINE)),
+    ("Flutter", ("package:flutter", ".dart:"),
+     re.compile(r'package:flutter/|\.dart:\d+:\d+')),
+    ("PHP", ("PHP ", ".php"),
+     re.compile(r'PHP (?:Fatal|Parse|Warning)|\.php(?: on line |:)\d+')),
+    ("Ruby", (".rb:",),
+     re.compile(r"\.rb:\d+:in [`']")),
+    ("Node.js", ("node:internal", "internal/", "node_modules/"),
+     re.compile(r'node:internal/|\(internal/[\w/]+\.js:\d+:\d+\)|node_modules/')),
+    ("JavaScript", (".js:", ".mjs:", ".ts:", "Error: "),
+     re.compile(r'^\s*at .*\.(?:js|mjs|ts):\d+:\d+\)?$|(?:Type|Reference|Syntax)Error: .* is not (?:a function|defined)',
+                re.MULTILINE)),
+    ("C++", (".cpp:", ".cc:", ".hpp:", ".h:", "Segmentation fault", "std::"),
+     re.compile(r'\.(?:cpp|cc|hpp|h):\d+:\d+: (?:error|warning)|Segmentation fault|std::\w+')),
+    ("SQL", ("SQLSTATE", "ORA-", "syntax error", "SQL syntax"),
+     re.compile(r'SQLSTATE\[|ORA-\d{5}|syntax error at or near|You have an error in your SQL syntax')),
+)
+
+# Keyword weights, scored from one tokenising pass over the scanned prefix
+KEYWORD_WEIGHTS = {
+    "Python": {"def": 3, "self": 2, "elif": 3, "except": 3, "None": 1, "import": 1, "print": 1,
+               "lambda": 2, "__init__": 4, "True": 1, "False": 1},
+    "JavaScript": {"function": 3, "const": 2, "let": 2, "var": 1, "console": 3, "undefined": 2,
+                   "typeof": 2, "prototype": 3, "document": 2, "window": 2},
+    "Node.js": {"require": 3, "process": 2, "exports": 3, "__dirname": 4, "npm": 2},
+    "React": {"React": 4, "useState": 4, "useEffect": 4, "className": 3, "props": 2, "jsx": 3},
+    "Java": {"public": 1, "static": 1, "void": 1, "System": 3, "Override": 3, "extends": 1,
+             "implements": 2, "ArrayList": 3, "throws": 3},
+    "C++": {"#include": 4, "std": 3, "cout": 4, "nullptr": 3, "template": 2, "vector": 1},
+    "C#": {"namespace": 2, "Console": 3, "using": 1, "Task": 1, "async": 1, "readonly": 2, "LINQ": 3},
+    "Go": {"package": 2, "func": 3, "fmt": 4, "nil": 2, "chan": 3, "defer": 3, "goroutine": 4},
+    "Rust": {"fn": 3, "mut": 3, "impl": 3, "println!": 4, "unwrap": 3, "Vec": 2, "crate": 3, "Option": 1},
+    "PHP": {"echo": 2, "php": 4, "function": 1, "array": 1},
+    "Ruby": {"puts": 3, "elsif": 4, "end": 1, "attr_accessor": 4, "do": 1, "require_relative": 4},
+    "Flutter": {"Widget": 3, "StatelessWidget": 4, "StatefulWidget": 4, "setState": 3, "BuildContext": 4},
+    "HTML/CSS": {"div": 2, "span": 1, "html": 2, "body": 1, "DOCTYPE": 4, "margin": 2, "padding": 2,
+                 "px": 1, "style": 1},
+    "SQL": {"SELECT": 3, "FROM": 1, "WHERE": 2, "JOIN": 2, "INSERT": 2, "TABLE": 2, "GROUP": 1,
+            "select": 2, "where": 1},
+}
+
+# Operators and markers counted with str.count
+SYMBOL_WEIGHTS = {
+    "Python": {":\n": 1},
+    "JavaScript": {"=>": 2, "===": 2},
+    "Go": {":=": 2},
+    "Rust": {"::": 1, "->": 1},
+    "C++": {"::": 1, "->": 1},
+    "PHP": {"<?php": 6, "$": 1},
+}
+
+TOKEN_PATTERN = re.compile(r'#?\w+!?')
+MAX_COUNT_PER_KEYWORD = 5
+MIN_KEYWORD_SCORE = 4
+
+# Identifiers understood by st.code / markdown fences
+HIGHLIGHT_NAMES = {
+    "Python": "python", "JavaScript": "javascript", "Node.js": "javascript", "React": "jsx",
+    "Java": "java", "C++": "cpp", "C#": "csharp", "Go": "go", "Rust": "rust", "PHP": "php",
+    "Ruby": "ruby", "Flutter": "dart", "HTML/CSS": "html", "SQL": "sql",
+}
+
+
+def detect_from_filename(filename):
+    if not filename:
+        return None
+    return EXTENSION_MAP.get(os.path.splitext(filename)[1].lower())
+
+
+def detect_from_shebang(text):
+    if not text.startswith("#!"):
+        return None
+    first_line = text.split("\n", 1)[0]
+    for marker, language in SHEBANG_MAP:
+        if marker in first_line:
+            return language
+    return None
+
+
+def detect_from_trace(text):
+    for language, guards, pattern in TRACE_SIGNATURES:
+        if any(guard in text for guard in guards) and pattern.search(text):
+            return language
+    return None
+
+
+def score_keywords(text):
+    counts = Counter(TOKEN_PATTERN.findall(text))
+    scores = {}
+    for language, weights in KEYWORD_WEIGHTS.items():
+        score = sum(weight * min(counts[word], MAX_COUNT_PER_KEYWORD)
+                    for word, weight in weights.items() if word in counts)
+        for symbol, weight in SYMBOL_WEIGHTS.get(language, {}).items():
+            score += weight * min(text.count(symbol), MAX_COUNT_PER_KEYWORD)
+        if score:
+            scores[language] = score
+    return scores
+
+
+def detect_language(text, filename=None):
+    language = detect_from_filename(filename)
+    if language:
+        return language
+    if not text:
+        return FALLBACK_LANGUAGE
+
+    sample = text[:SCAN_LIMIT]
+    language = detect_from_shebang(sample) or detect_from_trace(sample)
+    if language:
+        return language
+
+    scores = score_keywords(sample)
+    if not scores:
+        return FALLBACK_LANGUAGE
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= MIN_KEYWORD_SCORE else FALLBACK_LANGUAGE
+
+
+# Replace the "Auto-detect" placeholder with a concrete language for this input
+def resolve_language(selected, text=None, filename=None):
+    if selected != AUTO_DETECT:
+        return selected
+    return detect_language(text or "", filename)
+
+
+def highlight_name(language):
+    return HIGHLIGHT_NAMES.get(language, "text")
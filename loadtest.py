@@ -0,0 +1,302 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+# Headless load harness: drives the bugs.py flows in many concurrent simulated
+# Streamlit sessions against the offline stub backend and reports capacity numbers.
+# Each session runs in its own worker process; "rss MB" is the summed worker RSS and
+# "MB/sess" the average growth of one worker over its idle, pre-import footprint.
+#
+#   python loadtest.py --sessions 1,5,10,25 --iterations 5 --latency-ms 200
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+FLOWS = ["text", "image", "file", "followup", "history", "report"]
+
+APP_SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO_DIR!r})
+import bugs
+bugs.main()
+"""
+
+SAMPLE_TRACE = """Error: TypeError: undefined is not a function
+Stack trace:
+    at main.js:42:15
+    at init (main.js:38:5)"""
+
+SAMPLE_FILE = b"""def average(values):
+    return sum(values) / len(values)
+
+print(average([]))
+"""
+
+
+# Fake upload object; UploadedFile is also a BytesIO subclass
+class _Upload(io.BytesIO):
+    def __init__(self, name, mime, data):
+        super().__init__(data)
+        self.name = name
+        self.type = mime
+        self.size = len(data)
+
+
+# AppTest cannot drive st.file_uploader, so serve fixtures from session state instead
+def install_upload_shim():
+    import streamlit as st
+
+    original_file_uploader = st.file_uploader
+
+    def file_uploader(label, *args, key=None, **kwargs):
+        original_file_uploader(label, *args, key=key, **kwargs)
+        fixture = st.session_state.get('_loadtest_uploads', {}).get(key)
+        if fixture is None:
+            return None
+        return _Upload(*fixture)
+
+    st.file_uploader = file_uploader
+
+
+def make_screenshot_bytes():
+    image = Image.new("RGB", (640, 360), "#1e293b")
+    draw = ImageDraw.Draw(image)
+    draw.text((20, 20), SAMPLE_TRACE, fill="#ef4444")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def find_button(at, label_fragment):
+    for button in at.button:
+        if label_fragment in button.label:
+            return button
+    raise LookupError(f"No button matching {label_fragment!r}")
+
+
+# One simulated browser session cycling through the requested flows
+class SimulatedSession:
+    def __init__(self, flows, timeout, screenshot):
+        from streamlit.testing.v1 import AppTest
+
+        self.flows = flows
+        self.timeout = timeout
+        self.screenshot = screenshot
+        self.at = AppTest.from_string(APP_SCRIPT, default_timeout=timeout)
+        self.samples = []
+        self.errors = 0
+
+    def _timed_run(self, flow):
+        start = time.perf_counter()
+        try:
+            self.at.run(timeout=self.timeout)
+            if self.at.exception:
+                self.errors += 1
+        except Exception:
+            self.errors += 1
+        self.samples.append((flow, time.perf_counter() - start))
+
+    def _set_uploads(self, **uploads):
+        self.at.session_state['_loadtest_uploads'] = uploads
+
+    def run_flow(self, flow):
+        if flow == "text":
+            self._set_uploads()
+            self.at.text_area[0].input(SAMPLE_TRACE)
+            self.at.button(key="analyze_text").click()
+        elif flow == "image":
+            self._set_uploads(image_uploader=("bug.png", "image/png", self.screenshot))
+            self._timed_run("image_select")
+            self.at.button(key="analyze_image").click()
+        elif flow == "file":
+            self._set_uploads(file_uploader=("average.py", "text/x-python", SAMPLE_FILE))
+            self._timed_run("file_select")
+            self.at.button(key="analyze_file").click()
+        elif flow == "followup":
+            self._set_uploads()
+            self.at.text_input(key="followup_question").input("What about the async version?")
+            find_button(self.at, "Ask Follow-up").click()
+        elif flow == "report":
+            self._set_uploads()
+            find_button(self.at.sidebar, "Generate Report").click()
+        else:
+            # History expansion is a plain rerun once history exists
+            self._set_uploads()
+        self._timed_run(flow)
+
+    def run(self, iterations):
+        self._timed_run("load")
+        for _ in range(iterations):
+            for flow in self.flows:
+                self.run_flow(flow)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# Worker process for one session; AppTest swaps a process-global Runtime on every
+# run, so concurrent sessions cannot share an interpreter
+def _session_worker(flows, iterations, timeout, screenshot, start_event, results):
+    install_upload_shim()
+    session = SimulatedSession(flows, timeout, screenshot)
+    rss_idle = current_rss_mb()
+    start_event.wait()
+    cpu_before = time.process_time()
+    session.run(iterations)
+    import stub_backend
+    results.put({
+        "backend": dict(stub_backend.TOTALS),
+        "samples": session.samples,
+        "errors": session.errors,
+        "cpu_s": time.process_time() - cpu_before,
+        "rss_idle_mb": rss_idle,
+        "rss_mb": current_rss_mb(),
+    })
+
+
+def run_level(session_count, iterations, flows, timeout, screenshot):
+    results = multiprocessing.Queue()
+    start_event = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(
+            target=_session_worker,
+            args=(flows, iterations, timeout, screenshot, start_event, results),
+        )
+        for _ in range(session_count)
+    ]
+    for worker in workers:
+        worker.start()
+
+    wall_start = time.perf_counter()
+    start_event.set()
+    reports = [results.get() for _ in workers]
+    wall = time.perf_counter() - wall_start
+    for worker in workers:
+        worker.join()
+
+    samples = [sample for r in reports for sample in r["samples"]]
+    latencies = [duration for _, duration in samples]
+    per_flow = {}
+    for flow, duration in samples:
+        per_flow.setdefault(flow, []).append(duration)
+    cpu = sum(r["cpu_s"] for r in reports)
+    backend = {}
+    for report in reports:
+        for name, amount in report["backend"].items():
+            backend[name] = backend.get(name, 0) + amount
+
+    return {
+        "sessions": session_count,
+        "reruns": len(samples),
+        "errors": sum(r["errors"] for r in reports),
+        "wall_s": wall,
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "cpu_s": cpu,
+        "cpu_util": cpu / wall if wall else 0.0,
+        "rss_mb": sum(r["rss_mb"] for r in reports),
+        "rss_per_session_mb": statistics.mean(r["rss_mb"] - r["rss_idle_mb"] for r in reports),
+        "backend": backend,
+        "flows": {
+            flow: {
+                "count": len(values),
+                "mean_ms": statistics.mean(values) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+            }
+            for flow, values in per_flow.items()
+        },
+    }
+
+
+def print_report(results):
+    header = (
+        f"{'sessions':>8} {'reruns':>7} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'cpu':>6} {'rss MB':>8} {'MB/sess':>8} {'model calls':>11} {'sent tok':>9} {'cached tok':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['sessions']:>8} {r['reruns']:>7} {r['errors']:>4} {r['throughput_rps']:>8.1f} "
+            f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+            f"{r['cpu_util']:>6.2f} {r['rss_mb']:>8.1f} {r['rss_per_session_mb']:>8.2f} "
+            f"{r['backend'].get('generate_content', 0) + r['backend'].get('chats.send_message', 0):>11} "
+            f"{r['backend'].get('prompt_tokens', 0):>9} {r['backend'].get('cached_tokens', 0):>10}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent Bugs.qa sessions against the stub backend")
+    parser.add_argument("--sessions", default="1,5,10,25", help="Comma-separated concurrent session counts")
+    parser.add_argument("--iterations", type=int, default=3, help="Flow cycles per session")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"Comma-separated subset of {FLOWS}")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model latency")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-rerun timeout in seconds")
+    parser.add_argument("--context-cache-min-tokens", type=int, default=0,
+                        help="Minimum static prefix size for explicit context caching (0 = always cache)")
+    parser.add_argument("--rate-limit-rpm", type=float, default=0,
+                        help="Shared model rate limit per worker process (0 = unlimited)")
+    parser.add_argument("--shared-cache", default="",
+                        help="Shared analysis cache URL for the session processes; 'stub-redis' starts a local stand-in "
+                             "(without it analysis caching is disabled)")
+    parser.add_argument("--json", dest="json_path", help="Write raw results to this file")
+    args = parser.parse_args(argv)
+
+    flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"Unknown flows: {', '.join(sorted(unknown))}")
+
+    os.environ['BUGSQA_MODEL_BACKEND'] = 'stub'
+    os.environ['BUGSQA_STUB_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['BUGSQA_CONTEXT_CACHE_MIN_TOKENS'] = str(args.context_cache_min_tokens)
+    os.environ['BUGSQA_RATE_LIMIT_RPM'] = str(args.rate_limit_rpm)
+    # Each simulated session runs in its own process, so they behave like separate replicas
+    if args.shared_cache == "stub-redis":
+        from stub_redis import start_stub_redis
+        os.environ['BUGSQA_SHARED_CACHE'] = start_stub_redis().url
+    elif args.shared_cache:
+        os.environ['BUGSQA_SHARED_CACHE'] = args.shared_cache
+    else:
+        # Without a shared cache every analysis takes the model path, so latency reflects it
+        os.environ['BUGSQA_ANALYSIS_CACHE_TTL'] = '0'
+    screenshot = make_screenshot_bytes()
+
+    results = []
+    for count in [int(c) for c in args.sessions.split(",")]:
+        result = run_level(count, args.iterations, flows, args.timeout, screenshot)
+        results.append(result)
+        print(f"{count} sessions: p95 {result['p95_ms']:.1f} ms, {result['throughput_rps']:.1f} reruns/s", file=sys.stderr)
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
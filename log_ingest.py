@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import re
+from collections import deque
+
+from trace_compaction import ANSI_PATTERN, TIMESTAMP_PATTERN
+
+# Streaming log ingestion: a generator pipeline over the file that finds error windows
+# with surrounding context and clusters them by fingerprint. Only the per-cluster
+# representative and counters are kept, so memory does not grow with the log size.
+# Streamlit uploads are already fully buffered in memory; logs read from BUGSQA_LOG_DIR
+# are the constant-memory path for very large files.
+
+TRIGGER_PATTERN = re.compile(
+    r'\b(?:ERROR|FATAL|CRITICAL|SEVERE|PANIC)\b|Traceback \(most recent call last\)|'
+    r'\b\w+(?:Error|Exception)\b[:\s]|^panic:|Unhandled|Segmentation fault'
+)
+CONTINUATION_PATTERN = re.compile(
+    r'^\s+(?:at |File "|\.\.\. \d+ more)|^\s{2,}\S|^Caused by:|^During handling|^The above exception|'
+    r'^\w+(?:Error|Exception)\b|^goroutine \d+'
+)
+FRAME_PATTERN = re.compile(r'^\s*(?:at |File ")')
+# Substrings that every trigger contains; most log lines fail this check without touching the regex
+TRIGGER_HINTS = ('ERROR', 'FATAL', 'CRITICAL', 'SEVERE', 'PANIC', 'rror', 'xception', 'Traceback',
+                 'panic:', 'Unhandled', 'Segmentation')
+
+# Volatile parts replaced before fingerprinting
+NORMALIZERS = (
+    (re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE), '<uuid>'),
+    (re.compile(r'0x[0-9a-f]+', re.IGNORECASE), '<hex>'),
+    (re.compile(r'"[^"]*"|\'[^\']*\''), '<str>'),
+    (re.compile(r'\d+'), '<n>'),
+)
+
+BEFORE_LINES = 5
+AFTER_LINES = 10
+MAX_WINDOW_LINES = 200
+MAX_CLUSTERS = 500
+
+
+# Decoded, cleaned lines from a binary file object; gzip is detected by magic number
+def iter_log_lines(fileobj):
+    fileobj.seek(0)
+    if fileobj.read(2) == b'\x1f\x8b':
+        fileobj.seek(0)
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    else:
+        fileobj.seek(0)
+    for raw in fileobj:
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        if '\x1b' in line:
+            line = ANSI_PATTERN.sub('', line)
+        yield line
+
+
+def is_trigger(line):
+    return any(hint in line for hint in TRIGGER_HINTS) and TRIGGER_PATTERN.search(line) is not None
+
+
+# Yields (first_line_number, [lines]) for every error window. A window is the trigger
+# line plus preceding context, its stack-trace continuation and trailing context.
+def iter_error_windows(lines, before=BEFORE_LINES, after=AFTER_LINES):
+    history = deque(maxlen=before)
+    window = None
+    window_start = 0
+    trailing = 0
+    for number, line in enumerate(lines, 1):
+        triggered = is_trigger(line)
+        if window is not None:
+            if trailing == 0 and (triggered or CONTINUATION_PATTERN.match(line)) and len(window) < MAX_WINDOW_LINES:
+                window.append(line)
+                continue
+            if not triggered and trailing < after and len(window) < MAX_WINDOW_LINES:
+                window.append(line)
+                trailing += 1
+                continue
+            yield window_start, window
+            window = None
+            history.clear()
+
+        if triggered:
+            window_start = number - len(history)
+            window = list(history) + [line]
+            trailing = 0
+        else:
+            history.append(line)
+    if window is not None:
+        yield window_start, window
+
+
+def normalize_line(line):
+    line = TIMESTAMP_PATTERN.sub('', line, count=1).strip()
+    for pattern, replacement in NORMALIZERS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+# Same error type/message shape and same top frames => same fingerprint
+def fingerprint_window(window):
+    triggers = [normalize_line(line) for line in window if is_trigger(line)][:2]
+    frames = [normalize_line(line) for line in window if FRAME_PATTERN.match(line)][:3]
+    signature = triggers[0] if triggers else normalize_line(window[0])
+    digest = hashlib.sha1('\n'.join(triggers + frames).encode()).hexdigest()[:12]
+    return digest, signature[:160]
+
+
+def scan_log(fileobj, max_clusters=MAX_CLUSTERS):
+    stats = {"lines": 0, "windows": 0, "unclustered": 0}
+
+    def counted(lines):
+        for line in lines:
+            stats["lines"] += 1
+            yield line
+
+    clusters = {}
+    for start, window in iter_error_windows(counted(iter_log_lines(fileobj))):
+        stats["windows"] += 1
+        digest, signature = fingerprint_window(window)
+        cluster = clusters.get(digest)
+        if cluster is None:
+            if len(clusters) >= max_clusters:
+                stats["unclustered"] += 1
+                continue
+            cluster = clusters[digest] = {
+                "fingerprint": digest,
+                "signature": signature,
+                "count": 0,
+                "first_line": start,
+                "last_line": start,
+                "representative": '\n'.join(window),
+            }
+        cluster["count"] += 1
+        cluster["last_line"] = start
+
+    stats["clusters"] = sorted(clusters.values(), key=lambda c: (-c["count"], c["first_line"]))
+    return stats
+
+
+def cluster_prompt(cluster):
+    return (
+        f"Log excerpt representing {cluster['count']} similar occurrences "
+        f"(first at line {cluster['first_line']}, last at line {cluster['last_line']}):\n"
+        f"{cluster['representative']}"
+    )
@@ -0,0 +1,124 @@
+import cProfile
+import hmac
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# Operator-only CPU and memory profiling of a rerun or an analysis. Enabled for every
+# session with BUGSQA_PROFILE=rerun|analysis|all, or for one browser session with
+# ?profile=rerun|analysis|all&profile_token=... when BUGSQA_PROFILE_TOKEN is set.
+# Each profiled run writes <stamp>-<label>.prof (open with pstats or snakeviz) and
+# <stamp>-<label>-alloc.txt (top allocations) to BUGSQA_PROFILE_DIR.
+
+PROFILE_MODES = ("rerun", "analysis")
+PROFILE_DIR = os.environ.get('BUGSQA_PROFILE_DIR', 'profiles')
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 15
+SAFE_LABEL = re.compile(r"[^\w.-]")
+# tracemalloc is process-wide, so only one run is profiled at a time
+_PROFILE_LOCK = threading.Lock()
+
+
+# Set of enabled modes for this session; query_params is a mapping like st.query_params
+def profile_modes(query_params=None, env=None):
+    env = os.environ if env is None else env
+    requested = env.get('BUGSQA_PROFILE', '')
+    token = env.get('BUGSQA_PROFILE_TOKEN')
+    if not requested and token and query_params:
+        if hmac.compare_digest(str(query_params.get("profile_token", "")), token):
+            requested = str(query_params.get("profile", ""))
+    modes = {mode.strip() for mode in requested.lower().split(",") if mode.strip()}
+    if modes & {"1", "all", "true"}:
+        return set(PROFILE_MODES)
+    return modes & set(PROFILE_MODES)
+
+
+class ProfileReport:
+    def __init__(self, label):
+        self.label = label
+        self.started = datetime.now()
+        self.wall_ms = 0.0
+        self.peak_kb = 0.0
+        self.functions = []
+        self.allocations = []
+        self.paths = []
+
+
+def _function_rows(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "own ms": round(own * 1000, 2),
+            "cumulative ms": round(cumulative * 1000, 2),
+        })
+    rows.sort(key=lambda row: -row["cumulative ms"])
+    return rows[:TOP_FUNCTIONS]
+
+
+def _allocation_rows(snapshot):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size KB": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+
+
+def _save(report, profiler, directory):
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"{report.started:%Y%m%d-%H%M%S-%f}-{SAFE_LABEL.sub('_', report.label)}")
+    profiler.dump_stats(f"{stem}.prof")
+    with open(f"{stem}-alloc.txt", "w", encoding="utf-8") as alloc_file:
+        alloc_file.write(f"{report.label}: {report.wall_ms:.1f} ms, peak {report.peak_kb:.1f} KB traced\n\n")
+        for row in report.allocations:
+            alloc_file.write(f"{row['size KB']:>10.1f} KB {row['blocks']:>8} blocks  {row['location']}\n")
+    report.paths = [f"{stem}.prof", f"{stem}-alloc.txt"]
+
+
+# Runs fn() under cProfile and tracemalloc; returns (result, report). The report is None
+# when another run is already being profiled (e.g. an analysis inside a profiled rerun).
+def profile_call(label, fn, directory=PROFILE_DIR):
+    if not _PROFILE_LOCK.acquire(blocking=False):
+        return fn(), None
+    try:
+        report = ProfileReport(label)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = fn()
+        finally:
+            profiler.disable()
+            report.wall_ms = (time.perf_counter() - start) * 1000
+            report.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+        report.functions = _function_rows(profiler)
+        report.allocations = _allocation_rows(snapshot)
+        try:
+            _save(report, profiler, directory)
+        except OSError:
+            # The summary is still shown when the profile directory is not writable
+            report.paths = []
+        return result, report
+    finally:
+        _PROFILE_LOCK.release()
@@ -0,0 +1,307 @@
+import os
+import threading
+import time
+from string import Template
+
+from trace_compaction import estimate_tokens
+
+# Versioned prompt template registry. Each template is split into a static instruction
+# prefix (identical across calls, eligible for model-side context caching) and a small
+# variable part carrying the per-request context and the bug input.
+
+CONTEXT_CACHE_TTL_SECONDS = 3600
+# Explicit context caches have a model-side minimum size; smaller prefixes are sent as
+# a system instruction instead, which still keeps them a stable, implicitly cacheable prefix
+CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get('BUGSQA_CONTEXT_CACHE_MIN_TOKENS', '1024'))
+CACHE_FAILURE_COOLDOWN_SECONDS = 300
+
+
+class PromptTemplate:
+    def __init__(self, name, version, static_prefix, variable):
+        self.name = name
+        self.version = version
+        self.key = f"{name}@v{version}"
+        self.static_prefix = static_prefix.strip()
+        self.variable = Template(variable.strip())
+        self.static_tokens = estimate_tokens(self.static_prefix)
+
+    def render(self, **values):
+        return self.variable.substitute(**values)
+
+    def estimate_tokens(self, **values):
+        return self.static_tokens + estimate_tokens(self.render(**values))
+
+
+SYSTEM_ROLE = """
+You are an advanced software debugging AI assistant with expertise in multiple programming languages and frameworks.
+Each request starts with a **Context** block giving the bug severity, the programming language/framework,
+the user's code complexity level, the analysis depth (1 = quick fix, 5 = deep analysis) and the code fence
+language to use. Tailor the explanation to the complexity level and scale the level of detail to the analysis depth.
+"""
+
+TEXT_ANALYSIS_INSTRUCTIONS = SYSTEM_ROLE + """
+For text input, the request contains the bug description, error or code. Produce the following analysis:
+
+## 🔍 **IMMEDIATE DIAGNOSIS**
+Provide a quick summary of what's wrong.
+
+## 🎯 **ROOT CAUSE ANALYSIS**
+Identify the exact cause with detailed explanation.
+
+## 💡 **STEP-BY-STEP SOLUTION**
+1. Immediate fix steps
+2. Implementation details
+3. Testing approach
+
+## 👨‍💻 **CORRECTED CODE**
+Provide the complete, error-free code with explanations, in a fenced code block tagged with the
+code fence language from the context.
+
+## 🔧 **CODE IMPROVEMENTS**
+Suggest optimizations and best practices.
+
+## 🛡️ **PREVENTION STRATEGIES**
+How to avoid this issue in the future.
+
+## ⚡ **ALTERNATIVE SOLUTIONS**
+Provide 2-3 different approaches to solve this.
+
+## 🧪 **TESTING RECOMMENDATIONS**
+- Unit tests to write
+- Edge cases to consider
+- Validation steps
+
+## 📊 **PERFORMANCE IMPACT**
+Analyze if the fix affects performance.
+
+## 🔗 **RELATED ISSUES**
+Common related problems to watch for.
+
+Please format your response with clear headers and provide practical, actionable solutions.
+"""
+
+IMAGE_ANALYSIS_INSTRUCTIONS = SYSTEM_ROLE + """
+For image input, analyze the attached screenshot/image of a bug/error and provide comprehensive debugging assistance:
+
+## 👁️ **VISUAL ANALYSIS**
+Describe exactly what you see in the image.
+
+## 🔍 **ERROR IDENTIFICATION**
+Identify the specific error or issue shown.
+
+## 🎯 **ROOT CAUSE ANALYSIS**
+Explain why this error is occurring.
+
+## 💡 **COMPLETE SOLUTION**
+Provide step-by-step fix instructions.
+
+## 👨‍💻 **CORRECTED CODE**
+Write the complete, error-free code in a fenced code block tagged with the code fence language from the context.
+
+## 🔧 **IMPROVEMENTS & OPTIMIZATIONS**
+Suggest enhancements to the code.
+
+## 🛡️ **PREVENTION TIPS**
+How to avoid this issue going forward.
+
+## 🧪 **TESTING STRATEGY**
+Recommend testing approaches.
+
+Be specific and provide complete, working solutions.
+"""
+
+CONTEXT_BLOCK = """
+**Context:**
+- Bug Severity: $severity
+- Programming Language/Framework: $language
+- Code Fence Language: $fence
+- Code Complexity Level: $complexity
+- Analysis Depth: $analysis_depth/5
+
+**Bug Input Type:** $input_type
+"""
+
+TEMPLATES = {}
+
+
+def register_template(template):
+    TEMPLATES.setdefault(template.name, {})[template.version] = template
+    return template
+
+
+def get_template(name, version=None):
+    versions = TEMPLATES[name]
+    return versions[version if version is not None else max(versions)]
+
+
+register_template(PromptTemplate(
+    "text_analysis", 3, TEXT_ANALYSIS_INSTRUCTIONS,
+    CONTEXT_BLOCK + """
+**Bug Description/Error:**
+```
+$bug_input
+```
+$local_findings
+
+Provide the analysis at depth level $analysis_depth.
+""",
+))
+
+register_template(PromptTemplate(
+    "image_analysis", 2, IMAGE_ANALYSIS_INSTRUCTIONS,
+    CONTEXT_BLOCK + """
+Analyze the attached image at depth level $analysis_depth.
+""",
+))
+
+# Deep text analyses can be split: the core sections come from one request and each of
+# these independent sections from its own concurrent request (see engine.analyze_sections).
+# Headings and order match TEXT_ANALYSIS_INSTRUCTIONS, so the merged result keeps its layout.
+CORE_SECTIONS = (
+    ("## 🔍 **IMMEDIATE DIAGNOSIS**", "Provide a quick summary of what's wrong."),
+    ("## 🎯 **ROOT CAUSE ANALYSIS**", "Identify the exact cause with detailed explanation."),
+    ("## 💡 **STEP-BY-STEP SOLUTION**", "1. Immediate fix steps\n2. Implementation details\n3. Testing approach"),
+    ("## 👨‍💻 **CORRECTED CODE**", "Provide the complete, error-free code with explanations, in a fenced code block tagged with the\n"
+                                 "code fence language from the context."),
+    ("## 🔧 **CODE IMPROVEMENTS**", "Suggest optimizations and best practices."),
+)
+FANOUT_SECTIONS = (
+    ("## 🛡️ **PREVENTION STRATEGIES**", "How to avoid this issue in the future."),
+    ("## ⚡ **ALTERNATIVE SOLUTIONS**", "Provide 2-3 different approaches to solve this."),
+    ("## 🧪 **TESTING RECOMMENDATIONS**", "- Unit tests to write\n- Edge cases to consider\n- Validation steps"),
+    ("## 📊 **PERFORMANCE IMPACT**", "Analyze if the fix affects performance."),
+    ("## 🔗 **RELATED ISSUES**", "Common related problems to watch for."),
+)
+
+
+def _section_list(sections):
+    return "\n\n".join(f"{heading}\n{guidance}" for heading, guidance in sections)
+
+
+register_template(PromptTemplate(
+    "text_analysis_core", 2,
+    SYSTEM_ROLE + """
+For text input, the request contains the bug description, error or code. Produce the following analysis:
+
+""" + _section_list(CORE_SECTIONS) + """
+
+The remaining sections (prevention, alternatives, testing, performance impact, related issues) are written
+separately; do not include them. Please format your response with clear headers and provide practical,
+actionable solutions.
+""",
+    CONTEXT_BLOCK + """
+**Bug Description/Error:**
+```
+$bug_input
+```
+$local_findings
+
+Provide the analysis at depth level $analysis_depth.
+""",
+))
+
+register_template(PromptTemplate(
+    "text_analysis_section", 2,
+    SYSTEM_ROLE + """
+For text input, the request contains the bug description, error or code. You write exactly one section of a
+larger analysis whose other sections are written separately. Start with the requested section's heading,
+exactly as given below, and write nothing outside that section. The sections are:
+
+""" + _section_list(FANOUT_SECTIONS) + """
+""",
+    CONTEXT_BLOCK + """
+**Bug Description/Error:**
+```
+$bug_input
+```
+$local_findings
+
+Write only the $section section, at depth level $analysis_depth.
+""",
+))
+
+FOLLOWUP_INSTRUCTIONS = """
+You are an advanced software debugging AI assistant continuing a conversation about a bug you already analyzed.
+The original bug input and your earlier analysis follow. Answer the user's follow-up questions concisely,
+building on that analysis instead of repeating it. Include code only where it changes, in fenced code blocks
+tagged with the programming language.
+"""
+
+# The variable part is the per-entry context; it is fixed for the whole conversation
+register_template(PromptTemplate(
+    "followup", 1, FOLLOWUP_INSTRUCTIONS,
+    """
+**Original Bug Input ($input_type, $language):**
+```
+$bug_input
+```
+
+**Your Earlier Analysis:**
+$analysis
+""",
+))
+
+
+# Model-side context caches for static prefixes, shared by every session in the process
+class ContextCache:
+    def __init__(self, ttl=CONTEXT_CACHE_TTL_SECONDS, min_tokens=CONTEXT_CACHE_MIN_TOKENS):
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.entries = {}
+        self.failed_until = {}
+        self.lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "inline": 0, "failed": 0}
+
+    def _inline(self, system_instruction):
+        with self.lock:
+            self.stats["inline"] += 1
+        return {"system_instruction": system_instruction}
+
+    # Generation config that references the cached prefix, or carries it inline
+    def generation_config(self, client, model, template):
+        return self.config_for(client, model, template.key, template.static_prefix, template.static_tokens)
+
+    # Same for any fixed system instruction, cached under its own key
+    def config_for(self, client, model, key, system_instruction, tokens=None):
+        tokens = estimate_tokens(system_instruction) if tokens is None else tokens
+        if tokens < self.min_tokens or not hasattr(client, "caches"):
+            return self._inline(system_instruction)
+
+        cache_key = (model, key)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            # Leave a safety margin so a cache does not expire mid-request
+            if entry and entry[1] > now + 60:
+                self.stats["reused"] += 1
+                return {"cached_content": entry[0]}
+            if self.failed_until.get(cache_key, 0) > now:
+                self.stats["inline"] += 1
+                return {"system_instruction": system_instruction}
+
+        try:
+            cache = client.caches.create(
+                model=model,
+                config={
+                    "system_instruction": system_instruction,
+                    "display_name": key[:128],
+                    "ttl": f"{self.ttl}s",
+                },
+            )
+        except Exception:
+            with self.lock:
+                self.failed_until[cache_key] = now + CACHE_FAILURE_COOLDOWN_SECONDS
+                self.stats["failed"] += 1
+            return self._inline(system_instruction)
+
+        with self.lock:
+            for expired in [k for k, (_, expires) in self.entries.items() if expires <= now]:
+                del self.entries[expired]
+            self.entries[cache_key] = (cache.name, now + self.ttl)
+            self.stats["created"] += 1
+        return {"cached_content": cache.name}
+
+    # Accepts a template or a config_for key
+    def invalidate(self, model, template):
+        with self.lock:
+            self.entries.pop((model, getattr(template, "key", template)), None)
@@ -0,0 +1,54 @@
+import os
+import threading
+import time
+
+# Process-wide token bucket shared by every model call. Interactive requests wait for a
+# slot; background work only takes one while headroom for interactive requests remains.
+
+RATE_LIMIT_RPM = float(os.environ.get('BUGSQA_RATE_LIMIT_RPM', '60'))
+ACQUIRE_TIMEOUT_SECONDS = 30
+
+
+class RateLimitExceeded(RuntimeError):
+    pass
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=RATE_LIMIT_RPM, burst=None):
+        # 0 disables limiting (load tests against the offline backend)
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1.0, requests_per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Takes a slot if more than `reserve` would remain afterwards and returns 0; otherwise
+    # returns the seconds until one would. Computed under the lock, so it is never negative.
+    def _take(self, reserve=0):
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1 + reserve:
+                self.tokens -= 1
+                return 0
+            return (1 + reserve - self.tokens) / self.rate
+
+    # Non-blocking; succeeds only if more than `reserve` slots would remain afterwards
+    def try_acquire(self, reserve=0):
+        if self.rate <= 0:
+            return True
+        return self._take(reserve) == 0
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT_SECONDS):
+        if self.rate <= 0:
+            return
+        deadline = time.monotonic() + timeout
+        wait = self._take()
+        while wait:
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded("Too many analyses in progress right now, please retry in a moment")
+            time.sleep(min(wait, 1.0))
+            wait = self._take()
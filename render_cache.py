@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+
+from markdown_it import MarkdownIt
+
+# Analysis results rendered to HTML once, when they are stored, and looked up by entry ID.
+# Raw HTML in the model output is escaped and unsafe link schemes (javascript:, vbscript:,
+# file:, non-image data:) are dropped by the renderer, so the output can be embedded as-is.
+
+MARKDOWN = MarkdownIt("commonmark", {"html": False}).enable("table").enable("strikethrough")
+MAX_RENDERED_ENTRIES = 2000
+
+
+def render_result_html(markdown_text):
+    html = MARKDOWN.render(markdown_text)
+    # A blank line would end the surrounding HTML block in st.markdown; inside <pre>
+    # the entity keeps the newline, elsewhere it is insignificant whitespace
+    while "\n\n" in html:
+        html = html.replace("\n\n", "\n&#10;")
+    return html
+
+
+# Bounded LRU; evicted entries are re-rendered on demand
+class RenderCache:
+    def __init__(self, max_entries=MAX_RENDERED_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, entry_id, markdown_text):
+        html = render_result_html(markdown_text)
+        with self.lock:
+            self.entries[entry_id] = html
+            self.entries.move_to_end(entry_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return html
+
+    def get(self, entry_id, markdown_text):
+        with self.lock:
+            html = self.entries.get(entry_id)
+            if html is not None:
+                self.entries.move_to_end(entry_id)
+                return html
+        return self.put(entry_id, markdown_text)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
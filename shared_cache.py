@@ -0,0 +1,380 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# Analysis cache shared between app replicas. A small in-process tier sits in front of a
+# pluggable shared backend (SQLite file or any Redis-protocol server); values are
+# compressed, expire after a TTL, and concurrent misses for the same key compute once.
+# If the shared backend fails the cache keeps working local-only and retries it later.
+#
+#   BUGSQA_SHARED_CACHE=sqlite:////var/cache/bugsqa.db
+#   BUGSQA_SHARED_CACHE=redis://:password@cache-host:6379/0
+#   BUGSQA_ANALYSIS_CACHE_TTL=0 disables analysis caching entirely
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+COMPRESS_MIN_BYTES = 256
+SHARED_RETRY_SECONDS = 30
+# How long a replica waits for another replica that is already computing the same key
+LOCK_TTL_SECONDS = 120
+LOCK_POLL_SECONDS = 0.25
+KEY_PREFIX = "bugsqa:"
+
+
+class CacheError(Exception):
+    pass
+
+
+def encode_value(value):
+    raw = value.encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return b"r" + raw
+    return b"z" + zlib.compress(raw, 6)
+
+
+def decode_value(data):
+    if data[:1] == b"z":
+        return zlib.decompress(data[1:]).decode("utf-8")
+    return data[1:].decode("utf-8")
+
+
+# Backends store bytes; add() is set-if-absent and is used for cross-replica locks
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    # Deletes key only while it still holds value (used to release a lock this replica owns)
+    def delete_if(self, key, value):
+        if self.get(key) == value:
+            self.delete(key)
+
+
+# Bounded in-process LRU, also the fallback when no shared backend is reachable
+class MemoryCache(CacheBackend):
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def add(self, key, value, ttl):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return False
+            self.entries[key] = (value, time.time() + ttl)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_if(self, key, value):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == value:
+                del self.entries[key]
+
+
+# File-backed; replicas on one host or a shared volume see the same entries
+class SQLiteCache(CacheBackend):
+    PURGE_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.writes = 0
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", (key, value, time.time() + ttl)
+        )
+        self.writes += 1
+        if self.writes % self.PURGE_EVERY == 0:
+            connection.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+
+    def add(self, key, value, ttl):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+            inserted = connection.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)", (key, value, now + ttl)
+            ).rowcount
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return inserted == 1
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def delete_if(self, key, value):
+        self._connection().execute("DELETE FROM cache WHERE key = ? AND value = ?", (key, value))
+
+
+# Minimal RESP client (GET/SET/DEL) so no Redis client library is needed
+class RedisCache(CacheBackend):
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=0.5):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.local.sock, self.local.reader = sock, sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", str(self.db))
+
+    def _close(self):
+        sock = getattr(self.local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self.local.sock = self.local.reader = None
+
+    def _read_reply(self):
+        line = self.local.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheError("Connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise CacheError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise CacheError(f"Unexpected reply from cache server: {line[:40]!r}")
+
+    def _roundtrip(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.local.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _command(self, *args):
+        if getattr(self.local, "sock", None) is None:
+            self._connect()
+        try:
+            return self._roundtrip(*args)
+        except (OSError, CacheError):
+            self._close()
+            raise
+
+    def get(self, key):
+        return self._command("GET", key)
+
+    def set(self, key, value, ttl):
+        self._command("SET", key, value, "PX", int(ttl * 1000))
+
+    def add(self, key, value, ttl):
+        return self._command("SET", key, value, "PX", int(ttl * 1000), "NX") == "OK"
+
+    def delete(self, key):
+        self._command("DEL", key)
+
+    # GET then DEL (the default delete_if) leaves a small window, but needs no scripting support
+
+
+def create_backend(url):
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return SQLiteCache(parsed.path if not parsed.netloc else f"{parsed.netloc}{parsed.path}")
+    if parsed.scheme == "redis":
+        return RedisCache(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=parsed.password,
+        )
+    raise ValueError(f"Unsupported shared cache URL: {url}")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class TieredCache:
+    def __init__(self, shared=None, local=None, retry_after=SHARED_RETRY_SECONDS, ttl=DEFAULT_TTL_SECONDS):
+        self.shared = shared
+        self.ttl = ttl
+        self.local = local or MemoryCache()
+        self.retry_after = retry_after
+        self.shared_down_until = 0.0
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "waits": 0, "shared_errors": 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def shared_available(self):
+        return self.shared is not None and time.time() >= self.shared_down_until
+
+    # Runs a shared-backend call; on failure the tier is skipped for retry_after seconds
+    def _shared(self, method, *args, default=None):
+        if not self.shared_available():
+            return default
+        try:
+            return getattr(self.shared, method)(*args)
+        except (OSError, sqlite3.Error, CacheError):
+            self.shared_down_until = time.time() + self.retry_after
+            self._count("shared_errors")
+            return default
+
+    def get(self, key, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        key = KEY_PREFIX + key
+        data = self.local.get(key)
+        if data is not None:
+            self._count("local_hits")
+            return decode_value(data)
+        data = self._shared("get", key)
+        if data is not None:
+            self._count("shared_hits")
+            self.local.set(key, data, ttl)
+            return decode_value(data)
+        return None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        key = KEY_PREFIX + key
+        data = encode_value(value)
+        self.local.set(key, data, ttl)
+        self._shared("set", key, data, ttl)
+
+    # Single flight per key: in-process waiters share one computation, and other replicas
+    # wait on a short-lived lock entry in the shared tier instead of computing too
+    def get_or_compute(self, key, compute, ttl=None, cacheable=None):
+        value = self.get(key, ttl)
+        if value is not None:
+            return value
+
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+        if not leader:
+            self._count("waits")
+            flight.done.wait(LOCK_TTL_SECONDS)
+            if flight.value is not None:
+                return flight.value
+            return self.get_or_compute(key, compute, ttl, cacheable)
+
+        try:
+            lock_key = f"{KEY_PREFIX}lock:{key}"
+            # Only the owner may release the lock; a slow compute may outlive it and
+            # another replica may hold it by then
+            token = os.urandom(16)
+            if not self._shared("add", lock_key, token, LOCK_TTL_SECONDS, default=True):
+                self._count("waits")
+                deadline = time.time() + LOCK_TTL_SECONDS
+                while time.time() < deadline:
+                    time.sleep(LOCK_POLL_SECONDS)
+                    value = self.get(key, ttl)
+                    if value is not None:
+                        flight.value = value
+                        return value
+                    if not self._shared("get", lock_key):
+                        break
+            try:
+                self._count("misses")
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self.set(key, value, ttl)
+                    flight.value = value
+            finally:
+                self._shared("delete_if", lock_key, token)
+            return value
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+            flight.done.set()
+
+
+# None when caching is disabled (a TTL of 0 or less)
+def create_cache(url=None, ttl=None):
+    url = url if url is not None else os.environ.get('BUGSQA_SHARED_CACHE', '')
+    ttl = ttl if ttl is not None else int(os.environ.get('BUGSQA_ANALYSIS_CACHE_TTL', str(DEFAULT_TTL_SECONDS)))
+    if ttl <= 0:
+        return None
+    if not url:
+        return TieredCache(ttl=ttl)
+    try:
+        return TieredCache(create_backend(url), ttl=ttl)
+    except (OSError, sqlite3.Error):
+        # e.g. the cache volume is not mounted; keep serving from the local tier
+        return TieredCache(ttl=ttl)
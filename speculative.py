@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import time
+
+# Opt-in speculative analysis: once the text input and settings have been stable for a
+# debounce interval, analyze them in the background so the result is ready when the
+# user clicks Analyze. One slot per browser session; a newer input cancels the older job.
+
+SPECULATIVE_DEBOUNCE_SECONDS = 1.5
+# Rate-limit slots left untouched for interactive requests
+SPECULATIVE_RESERVE = 2
+MAX_SLOT_WAIT_SECONDS = 20
+SPECULATIVE_WORKERS = 2
+
+
+def speculative_key(prompt_input, *settings):
+    return (hashlib.sha1(prompt_input.encode()).hexdigest(),) + settings
+
+
+class SpeculativeAnalyzer:
+    def __init__(self, executor, limiter, debounce=SPECULATIVE_DEBOUNCE_SECONDS):
+        self.executor = executor
+        self.limiter = limiter
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.key = None
+        self.served_key = None
+        self.cancel_event = None
+        self.future = None
+        self.state = "idle"
+        self.stats = {"scheduled": 0, "cancelled": 0, "served": 0}
+        # (future, usage totals) of jobs whose usage the caller has not collected yet
+        self.job_usage = []
+
+    def _cancel_locked(self):
+        if self.cancel_event is not None and self.state != "done":
+            self.cancel_event.set()
+            self.stats["cancelled"] += 1
+        self.key = self.cancel_event = self.future = None
+        self.state = "idle"
+
+    # Called on every rerun with the current input; a no-op while the key is unchanged.
+    # usage, if given, is the job's own totals dict, filled only by the job's thread.
+    def schedule(self, key, analyze, usage=None):
+        with self.lock:
+            if key == self.key or key == self.served_key:
+                return
+            self.served_key = None
+            self._cancel_locked()
+            cancel_event = threading.Event()
+            self.key, self.cancel_event, self.state = key, cancel_event, "debouncing"
+            self.future = self.executor.submit(self._run, key, cancel_event, analyze)
+            self.stats["scheduled"] += 1
+            if usage is not None:
+                self.job_usage.append((self.future, usage))
+
+    def cancel(self):
+        with self.lock:
+            self._cancel_locked()
+
+    def _set_state(self, key, state):
+        with self.lock:
+            if self.key == key:
+                self.state = state
+
+    def _run(self, key, cancel_event, analyze):
+        if cancel_event.wait(self.debounce):
+            return None
+        self._set_state(key, "waiting")
+        # Low priority: poll for a slot that leaves headroom for interactive requests
+        deadline = time.monotonic() + MAX_SLOT_WAIT_SECONDS
+        while not self.limiter.try_acquire(reserve=SPECULATIVE_RESERVE):
+            if cancel_event.wait(0.5) or time.monotonic() > deadline:
+                self._set_state(key, "idle")
+                return None
+        if cancel_event.is_set():
+            return None
+        self._set_state(key, "running")
+        result = analyze()
+        self._set_state(key, "done")
+        if cancel_event.is_set() or result.startswith("❌"):
+            return None
+        return result
+
+    # Usage totals of finished jobs (served, cancelled or failed), each returned once, so
+    # the caller can merge them into its own totals on its own thread
+    def finished_usage(self):
+        finished, pending = [], []
+        with self.lock:
+            for future, usage in self.job_usage:
+                if future.done():
+                    finished.append(usage)
+                else:
+                    pending.append((future, usage))
+            self.job_usage = pending
+        return finished
+
+    def status(self):
+        with self.lock:
+            return self.state
+
+    # Result for `key` if a matching job finished or is already talking to the model;
+    # a job still debouncing or waiting for a slot is cancelled and None returned
+    def take(self, key, timeout=120):
+        with self.lock:
+            if key != self.key or self.future is None:
+                return None
+            future, state = self.future, self.state
+            if state in ("debouncing", "waiting"):
+                self._cancel_locked()
+                return None
+        try:
+            result = future.result(timeout=timeout)
+        except Exception:
+            result = None
+        with self.lock:
+            if self.key == key:
+                self.key = self.cancel_event = self.future = None
+                self.state = "idle"
+            if result is not None:
+                self.served_key = key
+                self.stats["served"] += 1
+        return result
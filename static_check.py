@@ -0,0 +1,297 @@
+import ast
+import builtins
+import json
+import re
+import symtable
+import textwrap
+
+# Local pre-analysis run before the model call. Python code is compiled and its symbol
+# tables checked for undefined names; other code gets a bracket-balance check and JSON
+# documents a parse check. Findings carry the exact line and column, can be shown
+# instantly, attached to the prompt, or replace the model call for definite errors
+# (Python parse errors).
+
+MAX_FINDINGS = 10
+CONTEXT_LINES = 2
+# Share of non-blank lines that must look like code before parse errors are trusted;
+# prose and error messages would otherwise "fail to parse" on every submission
+CODE_LINE_RATIO = 0.6
+CODE_LINE = re.compile(
+    r'[;{}]\s*$|^\s*[)\]}]|\w[(\[]|[^=!<>]=[^=]|^\s*(?:#|//|/\*|\*|@)|'
+    r'^\s*(?:def|class|import|from|return|if|elif|else|for|while|try|except|finally|with|raise|pass|break|'
+    r'continue|yield|async|await|fn|func|let|const|var|function|public|private|protected|static|package|'
+    r'include|using|namespace|struct|enum|impl|use|end|do|select|insert|update|delete|create)\b',
+    re.IGNORECASE
+)
+TRACE_MARKERS = ("Traceback (most recent call last)", "Exception in thread", "goroutine ", "panicked at")
+JSON_START = re.compile(r'\A\s*(?:\{\s*["}]|\[\s*[\[{"\d\]-])')
+JSON_CLOSERS = {"{": "}", "[": "]"}
+# Sidebar languages whose input may be a data document rather than code
+DOCUMENT_LANGUAGES = ("Other",)
+MODULE_NAMES = {"__name__", "__file__", "__doc__", "__builtins__", "__spec__", "__loader__", "__package__", "__path__"}
+BUILTIN_NAMES = set(dir(builtins))
+BRACKETS = {")": "(", "]": "[", "}": "{"}
+# Line/block comment markers per language; anything else uses C-style comments
+COMMENT_MARKERS = {
+    "Ruby": ("#", None),
+    "SQL": ("--", ("/*", "*/")),
+    "PHP": (("//", "#"), ("/*", "*/")),
+    "HTML/CSS": (None, ("/*", "*/")),
+}
+C_COMMENTS = ("//", ("/*", "*/"))
+# Rust lifetimes ('a) make single quotes unreliable as string delimiters
+NO_CHAR_QUOTES = ("Rust",)
+CHAR_LITERAL = re.compile(r"'(?:\\.|[^\\'\n])'")
+FIX_HINTS = {
+    "syntax": "Fix the syntax error at the marked position; the rest of the file is not checked until it parses.",
+    "undefined name": "Define or import the name before it is used, or correct its spelling.",
+    "brackets": "Balance the brackets: close each one in the reverse order it was opened.",
+    "json": "Fix the JSON at the marked position (quotes, commas and brackets are the usual culprits).",
+}
+
+
+def finding(severity, check, line, column, message):
+    return {"severity": severity, "check": check, "line": line, "column": column, "message": message}
+
+
+def check_python(code):
+    # Snippets copied from inside a function are indented as a whole
+    dedented = textwrap.dedent(code)
+    indent = _indent_width(code) - _indent_width(dedented)
+    try:
+        tree = ast.parse(dedented)
+    except SyntaxError as e:
+        return [finding("error", "syntax", e.lineno or 1, (e.offset or 1) + indent, f"{type(e).__name__}: {e.msg}")]
+    except ValueError:
+        # e.g. source containing null bytes
+        return []
+    findings = []
+    try:
+        compile(tree, "<input>", "exec")
+    except SyntaxError as e:
+        # Only compile() rejects 'return' outside function, 'await' outside async function
+        # and the like, which is exactly what a fragment pasted from a function body has
+        findings.append(finding("warning", "syntax", e.lineno or 1, e.offset or 1, f"{type(e).__name__}: {e.msg}"))
+    try:
+        findings += _undefined_names(dedented, tree)
+    except SyntaxError:
+        pass
+    for item in findings:
+        item["column"] += indent
+    return findings
+
+
+def _indent_width(code):
+    first = next((line for line in code.splitlines() if line.strip()), "")
+    return len(first) - len(first.lstrip())
+
+
+# Names read somewhere but bound nowhere (not in any scope, builtins or imports). Reported
+# as warnings: a pasted fragment may legitimately use names defined elsewhere.
+def _undefined_names(code, tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            return []
+
+    module = symtable.symtable(code, "<input>", "exec")
+    bound = set(BUILTIN_NAMES | MODULE_NAMES)
+    referenced = set()
+    tables = [module]
+    while tables:
+        table = tables.pop()
+        for symbol in table.get_symbols():
+            if symbol.is_assigned() or symbol.is_imported() or symbol.is_namespace() or symbol.is_parameter():
+                if table is module or symbol.is_declared_global():
+                    bound.add(symbol.get_name())
+            if symbol.is_referenced() and symbol.is_global():
+                referenced.add(symbol.get_name())
+        tables.extend(table.get_children())
+    missing = referenced - bound
+    if not missing:
+        return []
+
+    findings = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id in missing:
+            missing.discard(node.id)
+            findings.append(finding("warning", "undefined name", node.lineno, node.col_offset + 1,
+                                    f"NameError: name '{node.id}' is not defined"))
+    return findings
+
+
+# Reported as a warning: input that merely starts like JSON may be something else
+def check_json(text):
+    try:
+        json.loads(text)
+    except ValueError as e:
+        return [finding("warning", "json", e.lineno, e.colno, f"Invalid JSON: {e.msg}")]
+    return []
+
+
+# Starts like a JSON document and ends with the matching bracket, so code such as
+# [1, 2, 3].map(x => x * 2) is not mistaken for a broken document
+def json_shaped(text):
+    stripped = text.strip()
+    return bool(JSON_START.match(stripped)) and stripped[-1] == JSON_CLOSERS[stripped[0]]
+
+
+# Bracket balance with strings and comments skipped. Reported as warnings only: regex and
+# char literals (e.g. /[(]/ or '(') are not recognized, so an imbalance is not definite.
+def check_brackets(code, language):
+    line_comment, block_comment = COMMENT_MARKERS.get(language, C_COMMENTS)
+    line_comments = (line_comment,) if isinstance(line_comment, str) else line_comment or ()
+    quotes = '"`' if language in NO_CHAR_QUOTES else '"\'`'
+    stack = []
+    line, column, index, quote = 1, 0, 0, None
+    while index < len(code):
+        char = code[index]
+        if char == "\n":
+            line, column = line + 1, 0
+            # Only template strings span lines; an unterminated quote ends with its line
+            if quote != "`":
+                quote = None
+            index += 1
+            continue
+        column += 1
+        if quote:
+            if char == "\\":
+                index += 2
+                column += 1
+                continue
+            if char == quote:
+                quote = None
+        elif char in quotes:
+            quote = char
+        elif char == "'" and CHAR_LITERAL.match(code, index):
+            # Char literal in a language whose single quotes are not string delimiters
+            literal = CHAR_LITERAL.match(code, index).end() - index
+            index += literal
+            column += literal - 1
+            continue
+        elif any(code.startswith(marker, index) for marker in line_comments):
+            end = code.find("\n", index)
+            index = len(code) if end < 0 else end
+            continue
+        elif block_comment and code.startswith(block_comment[0], index):
+            end = code.find(block_comment[1], index + len(block_comment[0]))
+            end = len(code) if end < 0 else end + len(block_comment[1])
+            skipped = code[index:end]
+            newlines = skipped.count("\n")
+            if newlines:
+                line, column = line + newlines, len(skipped) - skipped.rfind("\n") - 1
+            else:
+                column += len(skipped) - 1
+            index = end
+            continue
+        elif char in "([{":
+            stack.append((char, line, column))
+        elif char in BRACKETS:
+            if not stack:
+                return [finding("warning", "brackets", line, column, f"Unmatched '{char}'")]
+            opener, open_line, open_column = stack.pop()
+            if opener != BRACKETS[char]:
+                return [finding("warning", "brackets", line, column,
+                                f"'{char}' does not match '{opener}' opened on line {open_line}, column {open_column}")]
+        index += 1
+    return [
+        finding("warning", "brackets", open_line, open_column, f"'{opener}' is never closed")
+        for opener, open_line, open_column in stack[-MAX_FINDINGS:]
+    ]
+
+
+# Findings sorted by position; empty when nothing was found or the input is not code.
+# Prose before and after the code is skipped; inside it, an error is only trusted on a
+# line that looks like code.
+def pre_analyze(text, language):
+    if json_shaped(text):
+        findings = check_json(text)
+        # Valid JSON needs no code checks; invalid input is only reported as a broken
+        # document when no programming language was selected or detected
+        if not findings or language in DOCUMENT_LANGUAGES:
+            return findings
+    lines = text.splitlines()
+    code_lines = [number for number, line in enumerate(lines) if line.strip() and CODE_LINE.search(line)]
+    if not code_lines or any(marker in text for marker in TRACE_MARKERS):
+        return []
+    offset = code_lines[0]
+    region = lines[offset:code_lines[-1] + 1]
+    if len(code_lines) / sum(1 for line in region if line.strip()) < CODE_LINE_RATIO:
+        return []
+
+    code = "\n".join(region)
+    findings = check_python(code) if language == "Python" else check_brackets(code, language)
+    for item in findings:
+        if item["severity"] == "error" and not CODE_LINE.search(region[min(item["line"], len(region)) - 1]):
+            item["severity"] = "warning"
+        item["line"] += offset
+    return sorted(findings, key=lambda item: (item["line"], item["column"]))[:MAX_FINDINGS]
+
+
+def has_errors(findings):
+    return any(item["severity"] == "error" for item in findings)
+
+
+# Source lines around a finding with a caret under the column
+def excerpt(text, line, column, context=CONTEXT_LINES):
+    lines = text.splitlines() or [""]
+    line = min(max(line, 1), len(lines))
+    first, last = max(1, line - context), min(len(lines), line + context)
+    width = len(str(last))
+    rows = []
+    for number in range(first, last + 1):
+        rows.append(f"{number:>{width}} | {lines[number - 1]}")
+        if number == line:
+            rows.append(f"{'':>{width}} | {' ' * max(column - 1, 0)}^")
+    return "\n".join(rows)
+
+
+# Block appended to the prompt so the model starts from the local findings
+def format_findings(findings, text):
+    if not findings:
+        return ""
+    items = "\n".join(
+        f"- Line {item['line']}, column {item['column']} ({item['severity']}): {item['message']}\n"
+        f"  `{_source_line(text, item['line']).strip()[:200]}`"
+        for item in findings
+    )
+    return (
+        "**Local Pre-analysis Findings** (from a local parser; confirm and fix these first "
+        "instead of re-deriving them, then cover anything else):\n" + items
+    )
+
+
+def _source_line(text, line):
+    lines = text.splitlines()
+    return lines[line - 1] if 0 < line <= len(lines) else ""
+
+
+# Analysis in the usual markdown layout, produced without a model call. Excerpts are
+# indented code blocks so they are not mistaken for fixed code by extract_code_blocks.
+def local_result(findings, text):
+    plural = "s" if len(findings) != 1 else ""
+    sections = [
+        "## 🔍 **IMMEDIATE DIAGNOSIS**",
+        f"Found {len(findings)} problem{plural} locally, without a model call:",
+    ]
+    for item in findings:
+        sections.append(f"**Line {item['line']}, column {item['column']}**: {item['message']}")
+        sections.append(textwrap.indent(excerpt(text, item["line"], item["column"]), "    "))
+    sections.append("## 💡 **STEP-BY-STEP SOLUTION**")
+    hints = list(dict.fromkeys(FIX_HINTS[item["check"]] for item in findings))
+    hints.append("Analyze again after fixing, or with the local pre-check attaching its findings, for a full review.")
+    sections.append("\n".join(f"{number}. {hint}" for number, hint in enumerate(hints, 1)))
+    return "\n\n".join(sections)
+
+
+PRECHECK_MODES = ("attach", "skip", "off")
+
+
+# (findings, prompt block, local result or None) for a pre-check mode: "attach" adds the
+# findings to the prompt, "skip" answers definite errors locally, "off" does nothing
+def precheck(text, language, mode="attach"):
+    if mode == "off":
+        return [], "", None
+    findings = pre_analyze(text, language)
+    if mode == "skip" and has_errors(findings):
+        return findings, "", local_result(findings, text)
+    return findings, format_findings(findings, text), None
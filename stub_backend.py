@@ -0,0 +1,164 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# Offline stand-in for the Gemini client used by bugs.py.
+# Enable with BUGSQA_MODEL_BACKEND=stub; BUGSQA_STUB_LATENCY_MS adds simulated model latency.
+
+STUB_RESPONSE = """## 🔍 **IMMEDIATE DIAGNOSIS**
+The reported error is caused by calling a value that is not a function.
+
+## 🎯 **ROOT CAUSE ANALYSIS**
+`handler` is read before it has been assigned, so it is still `undefined`.
+
+## 👨‍💻 **CORRECTED CODE**
+```{language}
+handler()
+```
+
+```{language}
+if (typeof handler === "function") {{
+    handler();
+}}
+```
+
+## 🛡️ **PREVENTION STRATEGIES**
+Initialise callbacks before use and add a guard for optional handlers.
+"""
+
+# Single-section requests of a split deep analysis (prompts.text_analysis_section)
+SECTION_REQUEST = re.compile(r"Write only the (.+?) section")
+
+
+# Rough token estimate matching the ~4 characters per token rule of thumb
+def _estimate_tokens(value):
+    if isinstance(value, (bytes, bytearray)):
+        return max(1, len(value) // 750)
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_tokens(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_estimate_tokens(v) for v in value.values())
+    return max(1, len(str(value)) // 4)
+
+
+def _config_value(config, name):
+    if config is None:
+        return None
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+class _StubModels:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def generate_content(self, model, contents, config=None):
+        return self._backend.respond("generate_content", contents, config)
+
+
+# Chats are stateless on the wire: every turn re-sends the history it holds
+class _StubChat:
+    def __init__(self, backend, config, history):
+        self._backend = backend
+        self._config = config
+        self.history = list(history or [])
+
+    def send_message(self, message):
+        response = self._backend.respond("chats.send_message", self.history + [message], self._config)
+        self.history.append({"role": "user", "parts": [{"text": message}]})
+        self.history.append({"role": "model", "parts": [{"text": response.text}]})
+        return response
+
+
+class _StubChats:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def create(self, model, config=None, history=None):
+        return _StubChat(self._backend, config, history)
+
+
+class _StubCaches:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def create(self, model, config=None):
+        tokens = _estimate_tokens(_config_value(config, "system_instruction") or "")
+        name = f"cachedContents/{hashlib.sha256(f'{model}:{tokens}:{time.time()}'.encode()).hexdigest()[:16]}"
+        with self._backend.lock:
+            self._backend.cached_contents[name] = tokens
+        self._backend.count(**{"caches.create": 1})
+        return SimpleNamespace(name=name, model=model, usage_metadata=SimpleNamespace(total_token_count=tokens))
+
+
+class _StubFiles:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def upload(self, file, config=None):
+        self._backend.simulate_latency()
+        data = file if isinstance(file, (bytes, bytearray)) else file.read()
+        self._backend.count(**{"files.upload": 1})
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        return SimpleNamespace(name=f"files/{digest}", uri=f"stub://files/{digest}", size_bytes=len(data))
+
+
+# Call and token counters across every StubClient in the process (read by loadtest.py)
+TOTALS = {}
+_TOTALS_LOCK = threading.Lock()
+
+
+class StubClient:
+    def __init__(self, latency_ms=None):
+        if latency_ms is None:
+            latency_ms = float(os.environ.get('BUGSQA_STUB_LATENCY_MS', '0'))
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.cached_contents = {}
+        self.models = _StubModels(self)
+        self.files = _StubFiles(self)
+        self.caches = _StubCaches(self)
+        self.chats = _StubChats(self)
+
+    def respond(self, call, contents, config):
+        self.simulate_latency()
+        cached_tokens = 0
+        cache_name = _config_value(config, "cached_content")
+        if cache_name:
+            with self.lock:
+                if cache_name not in self.cached_contents:
+                    raise ValueError(f"Cached content {cache_name} not found")
+                cached_tokens = self.cached_contents[cache_name]
+        system_instruction = _config_value(config, "system_instruction")
+        sent_tokens = _estimate_tokens(contents) + (_estimate_tokens(system_instruction) if system_instruction else 0)
+        section = SECTION_REQUEST.search(str(contents))
+        if section:
+            text = f"## {section.group(1)}\nStub content for this section."
+        else:
+            text = STUB_RESPONSE.format(language="text")
+        self.count(**{call: 1, "prompt_tokens": sent_tokens, "cached_tokens": cached_tokens})
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=sent_tokens + cached_tokens,
+                candidates_token_count=_estimate_tokens(text),
+                cached_content_token_count=cached_tokens,
+            ),
+        )
+
+    def count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.calls[name] = self.calls.get(name, 0) + amount
+        with _TOTALS_LOCK:
+            for name, amount in amounts.items():
+                TOTALS[name] = TOTALS.get(name, 0) + amount
+
+    def simulate_latency(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
@@ -0,0 +1,118 @@
+import argparse
+import socketserver
+import threading
+import time
+
+# Local stand-in for a Redis server speaking the subset of RESP used by shared_cache.py
+# (PING, GET, SET with EX/PX/NX/XX, DEL, FLUSHDB). For tests and load runs, not production:
+#   python stub_redis.py --port 6390
+#   BUGSQA_SHARED_CACHE=redis://127.0.0.1:6390/0 streamlit run bugs.py
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry[0]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, str):
+            self.wfile.write(f"+{value}\r\n".encode())
+        else:
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self.read_command()
+            if not args:
+                return
+            command = args[0].upper()
+            with store.lock:
+                if command == b"PING":
+                    self.reply("PONG")
+                elif command == b"GET":
+                    self.reply(store.get(args[1]))
+                elif command == b"SET":
+                    key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+                    expires = None
+                    if b"PX" in options:
+                        expires = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+                    elif b"EX" in options:
+                        expires = time.time() + int(options[options.index(b"EX") + 1])
+                    exists = store.get(key) is not None
+                    if b"NX" in options and exists or b"XX" in options and not exists:
+                        self.reply(None)
+                    else:
+                        store.data[key] = (value, expires)
+                        self.reply("OK")
+                elif command == b"DEL":
+                    self.reply(sum(store.data.pop(key, None) is not None for key in args[1:]))
+                elif command == b"FLUSHDB":
+                    store.data.clear()
+                    self.reply("OK")
+                elif command in (b"SELECT", b"AUTH"):
+                    self.reply("OK")
+                elif command == b"QUIT":
+                    self.reply("OK")
+                    return
+                else:
+                    self.wfile.write(f"-ERR unknown command '{command.decode(errors='replace')}'\r\n".encode())
+
+
+class StubRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.store = _Store()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+
+# Serves on a daemon thread; port 0 picks a free port (see server.url)
+def start_stub_redis(host="127.0.0.1", port=0):
+    server = StubRedisServer(host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in for the shared analysis cache")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server = StubRedisServer(args.host, args.port)
+    print(f"Serving {server.url}")
+    server.serve_forever()
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from rate_limit import RateLimiter, RateLimitExceeded
+
+
+def test_acquire_waits_for_a_refill():
+    limiter = RateLimiter(requests_per_minute=600, burst=1)
+    limiter.acquire()
+    start = time.monotonic()
+    limiter.acquire(timeout=1)
+    assert time.monotonic() - start >= 0.05
+
+
+def test_acquire_times_out():
+    limiter = RateLimiter(requests_per_minute=6, burst=1)
+    limiter.acquire()
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(timeout=0.1)
+
+
+# A background try_acquire can refill the bucket between acquire()'s check and its
+# wait computation; the wait must never go negative
+def test_acquire_never_sleeps_a_negative_time(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=60, burst=4)
+    limiter.tokens = 0
+    refill = limiter.try_acquire
+
+    def try_acquire_then_refill(reserve=0):
+        acquired = refill(reserve)
+        limiter.tokens = limiter.capacity
+        return acquired
+
+    def sleep(seconds):
+        assert seconds >= 0
+        limiter.tokens = limiter.capacity
+
+    monkeypatch.setattr(limiter, "try_acquire", try_acquire_then_refill)
+    monkeypatch.setattr("rate_limit.time.sleep", sleep)
+    limiter.acquire(timeout=5)
@@ -0,0 +1,35 @@
+from static_check import has_errors, pre_analyze, precheck
+
+
+# Fragments pasted from a function body only fail compile(), never ast.parse()
+def test_function_body_fragment_is_not_a_definite_error():
+    findings = pre_analyze("    x = compute()\n    return x + y", "Python")
+    assert not has_errors(findings)
+    assert any("'return' outside function" in item["message"] for item in findings)
+    assert precheck("    x = compute()\n    return x + y", "Python", "skip")[2] is None
+
+
+def test_await_and_break_fragments_are_warnings():
+    assert not has_errors(pre_analyze("    data = await fetch(url)\n    print(data)", "Python"))
+    assert not has_errors(pre_analyze("    if done(item):\n        break\n    item = item.next", "Python"))
+
+
+def test_parse_errors_stay_definite():
+    findings = pre_analyze("def broken(:\n    return 1", "Python")
+    assert has_errors(findings)
+    assert findings[0]["line"] == 1
+
+
+# Code that starts with a list or dict literal is not a JSON document
+def test_code_starting_with_a_literal_is_not_json():
+    for code in ('["a", "b"].forEach(x => console.log(x));', "[1, 2, 3].map(x => x * 2)"):
+        for language in ("JavaScript", "Other"):
+            assert not any(item["check"] == "json" for item in pre_analyze(code, language))
+            assert precheck(code, language, "skip")[2] is None
+
+
+def test_invalid_json_document_is_a_warning():
+    findings = pre_analyze('{"name": "app", "version": 1,}', "Other")
+    assert [item["check"] for item in findings] == ["json"]
+    assert not has_errors(findings)
+    assert pre_analyze('{"name": "app", "version": 1}', "Other") == []
@@ -0,0 +1,21 @@
+from trace_compaction import compact_trace
+
+TRACEBACK = (
+    'Traceback (most recent call last):\n'
+    '  File "grid.py", line 6, in <module>\n'
+    '    print(grid[4])\n'
+    'IndexError: list index out of range'
+)
+
+
+# Repeated code lines may be the bug, so code submitted with its traceback is kept as is
+def test_code_with_traceback_keeps_repeated_lines():
+    code = "grid = []\n" + "grid.append([0, 0, 0])\n" * 4
+    assert compact_trace(code + TRACEBACK)["text"] == code + TRACEBACK
+
+
+def test_repeated_frames_are_collapsed():
+    frames = '  File "app.py", line 9, in walk\n    return walk(node.next)\n' * 40
+    text = compact_trace("Traceback (most recent call last):\n" + frames + "RecursionError: maximum recursion depth exceeded")["text"]
+    assert text.count('File "app.py"') == 1
+    assert "[... previous 2-line block repeated 39 more times]" in text
@@ -0,0 +1,246 @@
+import re
+from itertools import groupby
+
+# Stack-trace compaction applied to pasted input before it is embedded in a prompt
+
+ANSI_PATTERN = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07]*\x07')
+TIMESTAMP_PATTERN = re.compile(
+    r'^\s*\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\]?\s*'
+    r'|^\s*\[?\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\]?\s+'
+)
+
+# Frame line formats: Python, Java/Kotlin/Scala, JavaScript/Node
+PYTHON_FRAME = re.compile(r'^\s*File "([^"]+)", line \d+')
+JAVA_FRAME = re.compile(r'^\s*at ([\w$.]+)\(.*\)\s*$')
+JS_FRAME = re.compile(r'^\s*at (?:.+ \()?([^()\s]+):\d+:\d+\)?\s*$')
+
+LIBRARY_PATH_MARKERS = (
+    'site-packages', 'dist-packages', '/lib/python', '\\lib\\python', '<frozen',
+    'node_modules', 'node:internal', 'internal/',
+)
+LIBRARY_PACKAGE_PREFIXES = (
+    'java.', 'javax.', 'jdk.', 'sun.', 'com.sun.', 'kotlin.', 'scala.',
+    'org.springframework.', 'org.apache.', 'org.hibernate.', 'org.junit.',
+    'io.netty.', 'reactor.', 'com.google.', 'org.eclipse.', 'net.bytebuddy.',
+)
+
+MAX_BLOCK_LINES = 8
+MIN_REPEATS = 3
+MIN_LIBRARY_RUN = 3
+DEFAULT_MAX_CHARS = 12000
+IMPORTANT_LINE = re.compile(r'(error|exception|caused by|traceback|fatal|panic)', re.IGNORECASE)
+TRACE_MARKER = re.compile(
+    r'Traceback \(most recent call last\)|Exception in thread "|^Caused by: |^goroutine \d+ \[|panicked at',
+    re.MULTILINE
+)
+# Timestamped lines needed before input is treated as a log
+MIN_LOG_LINES = 2
+
+
+# Rough token estimate (~4 characters per token for code and English)
+def estimate_tokens(text):
+    return (len(text) + 3) // 4
+
+
+# Returns (is_frame, is_library, library_label) for a single line
+def classify_frame(line):
+    match = PYTHON_FRAME.match(line)
+    if match:
+        path = match.group(1)
+        if any(marker in path for marker in LIBRARY_PATH_MARKERS):
+            label = re.split(r'site-packages[/\\]|dist-packages[/\\]', path)[-1].split('/')[0].split('\\')[0]
+            return True, True, label
+        return True, False, None
+
+    match = JAVA_FRAME.match(line)
+    if match:
+        qualified = match.group(1)
+        if qualified.startswith(LIBRARY_PACKAGE_PREFIXES):
+            return True, True, '.'.join(qualified.split('.')[:2])
+        return True, False, None
+
+    match = JS_FRAME.match(line)
+    if match:
+        location = match.group(1)
+        if any(marker in location for marker in LIBRARY_PATH_MARKERS):
+            if 'node_modules' in location:
+                return True, True, location.split('node_modules/')[-1].split('/')[0]
+            return True, True, 'node'
+        return True, False, None
+
+    return False, False, None
+
+
+def strip_noise(lines):
+    cleaned = []
+    for line in lines:
+        line = ANSI_PATTERN.sub('', line)
+        line = TIMESTAMP_PATTERN.sub('', line, count=1)
+        cleaned.append(line.rstrip())
+    return cleaned
+
+
+# Collapse consecutive repeats of any block of 1..MAX_BLOCK_LINES lines
+def collapse_repeats(lines):
+    result = []
+    i = 0
+    n = len(lines)
+    while i < n:
+        best_size, best_reps = 0, 1
+        for size in range(1, MAX_BLOCK_LINES + 1):
+            if i + size * MIN_REPEATS > n:
+                break
+            block = lines[i:i + size]
+            if not any(line.strip() for line in block):
+                continue
+            reps = 1
+            while lines[i + reps * size:i + (reps + 1) * size] == block:
+                reps += 1
+            if reps >= MIN_REPEATS and reps * size > best_reps * best_size:
+                best_size, best_reps = size, reps
+        if best_size:
+            result.extend(lines[i:i + best_size])
+            noun = "line" if best_size == 1 else f"{best_size}-line block"
+            result.append(f"    [... previous {noun} repeated {best_reps - 1} more times]")
+            i += best_size * best_reps
+        else:
+            result.append(lines[i])
+            i += 1
+    return result
+
+
+# Group frame lines (plus Python's indented source line) into frames
+def _frame_spans(lines):
+    spans = []
+    i = 0
+    while i < len(lines):
+        is_frame, is_library, label = classify_frame(lines[i])
+        end = i + 1
+        if is_frame and PYTHON_FRAME.match(lines[i]):
+            if end < len(lines) and lines[end].startswith('    ') and not classify_frame(lines[end])[0]:
+                end += 1
+        spans.append((i, end, is_frame, is_library, label))
+        i = end
+    return spans
+
+
+# Fold runs of library/framework frames, keeping the first and last frame of each run
+def fold_library_frames(lines):
+    result = []
+    spans = _frame_spans(lines)
+    i = 0
+    while i < len(spans):
+        start, end, is_frame, is_library, label = spans[i]
+        if not (is_frame and is_library):
+            result.extend(lines[start:end])
+            i += 1
+            continue
+        j = i
+        labels = []
+        while j < len(spans) and spans[j][2] and spans[j][3]:
+            if spans[j][4] not in labels:
+                labels.append(spans[j][4])
+            j += 1
+        run = spans[i:j]
+        if len(run) >= MIN_LIBRARY_RUN:
+            first, last = run[0], run[-1]
+            result.extend(lines[first[0]:first[1]])
+            hidden = len(run) - 2
+            result.append(f"    [... {hidden} framework frames folded: {', '.join(labels[:5])}]")
+            result.extend(lines[last[0]:last[1]])
+        else:
+            for span in run:
+                result.extend(lines[span[0]:span[1]])
+        i = j
+    return result
+
+
+# Keep head and tail plus important middle lines until the character budget is spent.
+# Lines whose trace_flags entry is False (code, messages) are always kept.
+def cap_length(lines, max_chars, trace_flags=None):
+    text = '\n'.join(lines)
+    if len(text) <= max_chars:
+        return lines
+    trace_flags = trace_flags or [True] * len(lines)
+
+    head_budget = tail_budget = int(max_chars * 0.4)
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > head_budget:
+            break
+        head.append(line)
+        used += len(line) + 1
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > tail_budget:
+            break
+        tail.insert(0, line)
+        used += len(line) + 1
+
+    middle_end = len(lines) - len(tail)
+    middle = lines[len(head):middle_end]
+    remaining = max_chars - sum(len(line) + 1 for line in head + tail)
+    kept = []
+    for line, is_trace in zip(middle, trace_flags[len(head):middle_end]):
+        is_frame, is_library, _ = classify_frame(line)
+        is_key = IMPORTANT_LINE.search(line) or (is_frame and not is_library)
+        if not is_trace or (is_key and len(line) + 1 <= remaining):
+            kept.append(line)
+            remaining -= len(line) + 1
+    omitted = len(middle) - len(kept)
+    if not omitted:
+        return lines
+    marker = f"[... {omitted} lines omitted, {len(kept)} key lines kept ...]"
+    return head + [marker] + kept + tail
+
+
+# Stack frames, trace markers, terminal escapes or timestamped log lines. Plain code is
+# never compacted: collapsing or capping it would change the code the model analyzes.
+def looks_like_trace(lines):
+    if any(ANSI_PATTERN.search(line) for line in lines):
+        return True
+    if TRACE_MARKER.search('\n'.join(lines)):
+        return True
+    if any(classify_frame(line)[0] for line in lines):
+        return True
+    return sum(1 for line in lines if TIMESTAMP_PATTERN.match(line)) >= MIN_LOG_LINES
+
+
+# Frame lines (with Python's source line), timestamped log lines and lines carrying
+# terminal escapes; everything else is code or a message and is passed through as is
+def trace_line_flags(raw_lines, lines):
+    flags = [bool(TIMESTAMP_PATTERN.match(line) or ANSI_PATTERN.search(line)) for line in raw_lines]
+    for start, end, is_frame, _, _ in _frame_spans(lines):
+        if is_frame:
+            flags[start:end] = [True] * (end - start)
+    return flags
+
+
+def compact_trace(text, max_chars=DEFAULT_MAX_CHARS):
+    lines = text.splitlines()
+    if not looks_like_trace(lines):
+        return {
+            "text": text,
+            "original_tokens": estimate_tokens(text),
+            "compacted_tokens": estimate_tokens(text),
+            "changed": False,
+        }
+    cleaned = strip_noise(lines)
+    # Repeats are collapsed and frames folded only within runs of trace lines, so code
+    # submitted with its traceback (where a repeated line may be the bug) stays intact
+    compacted, trace_flags = [], []
+    flagged = zip(cleaned, trace_line_flags(lines, cleaned))
+    for is_trace, run in groupby(flagged, key=lambda item: item[1]):
+        run = [line for line, _ in run]
+        if is_trace:
+            run = fold_library_frames(collapse_repeats(run))
+        compacted.extend(run)
+        trace_flags.extend([is_trace] * len(run))
+    compacted = cap_length(compacted, max_chars, trace_flags)
+    compacted_text = '\n'.join(compacted).strip('\n')
+    return {
+        "text": compacted_text,
+        "original_tokens": estimate_tokens(text),
+        "compacted_tokens": estimate_tokens(compacted_text),
+        "changed": compacted_text != text.strip('\n'),
+    }
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Token and cost accounting from the usage metadata of every model call, aggregated
+# per session (by the caller), per day and globally, plus an optional budget governor.
+
+# USD per million tokens: (input, output, cached input)
+MODEL_PRICING = {
+    "gemini-2.0-flash": (0.10, 0.40, 0.025),
+    "gemini-2.0-flash-lite": (0.075, 0.30, 0.01875),
+}
+# Cheaper model to route to when the budget runs low
+CHEAPER_MODELS = {
+    "gemini-2.0-flash": "gemini-2.0-flash-lite",
+}
+USAGE_LOG = os.environ.get('BUGSQA_USAGE_LOG')
+MONTHLY_BUDGET_USD = float(os.environ.get('BUGSQA_MONTHLY_BUDGET_USD', '0'))
+
+
+def empty_totals():
+    return {"calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cost": 0.0}
+
+
+def estimate_cost(model, input_tokens, output_tokens, cached_tokens):
+    input_price, output_price, cached_price = MODEL_PRICING.get(model, MODEL_PRICING["gemini-2.0-flash"])
+    return (
+        (input_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + output_tokens * output_price
+    ) / 1_000_000
+
+
+# One usage record per model call; a failed call is recorded with ok=False
+def usage_record(model, response=None, ok=True):
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model": model,
+        "ok": ok,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": cached_tokens,
+        "cost": estimate_cost(model, input_tokens, output_tokens, cached_tokens),
+    }
+
+
+def add_usage(totals, record):
+    totals["calls"] += 1
+    totals["errors"] += not record["ok"]
+    for key in ("input_tokens", "output_tokens", "cached_tokens", "cost"):
+        totals[key] += record[key]
+    return totals
+
+
+def merge_totals(totals, other):
+    for key in totals:
+        totals[key] += other[key]
+    return totals
+
+
+def success_rate(totals):
+    if not totals["calls"]:
+        return None
+    return 100.0 * (totals["calls"] - totals["errors"]) / totals["calls"]
+
+
+# Process-wide per-day and global totals, optionally persisted as an append-only JSONL log
+class UsageLedger:
+    def __init__(self, path=USAGE_LOG):
+        self.path = path
+        self.lock = threading.Lock()
+        self.total = empty_totals()
+        self.by_day = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        self._add(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+
+    def _add(self, record):
+        add_usage(self.total, record)
+        add_usage(self.by_day.setdefault(record["timestamp"][:10], empty_totals()), record)
+
+    def record(self, record):
+        with self.lock:
+            self._add(record)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as log_file:
+                    log_file.write(json.dumps(record) + "\n")
+
+    def day(self, date=None):
+        date = date or datetime.now().date().isoformat()
+        with self.lock:
+            return dict(self.by_day.get(date, empty_totals()))
+
+    def month_cost(self, month=None):
+        month = month or datetime.now().strftime("%Y-%m")
+        with self.lock:
+            return sum(totals["cost"] for day, totals in self.by_day.items() if day.startswith(month))
+
+    def totals(self):
+        with self.lock:
+            return dict(self.total)
+
+
+# Lowers the analysis depth and then routes to a cheaper model as the month's budget runs down
+class BudgetGovernor:
+    # (fraction of budget remaining at or below which the step applies, max depth, use cheaper model)
+    STEPS = ((0.10, 1, True), (0.25, 2, True), (0.50, 3, False))
+
+    def __init__(self, ledger, monthly_budget=MONTHLY_BUDGET_USD):
+        self.ledger = ledger
+        self.monthly_budget = monthly_budget
+
+    @property
+    def enabled(self):
+        return self.monthly_budget > 0
+
+    def remaining_fraction(self):
+        if not self.enabled:
+            return 1.0
+        return max(0.0, 1.0 - self.ledger.month_cost() / self.monthly_budget)
+
+    # (model, depth) to actually use for a request
+    def plan(self, model, analysis_depth):
+        remaining = self.remaining_fraction()
+        for threshold, max_depth, cheaper in self.STEPS:
+            if remaining <= threshold:
+                return (CHEAPER_MODELS.get(model, model) if cheaper else model), min(analysis_depth, max_depth)
+        return model, analysis_depth